@@ -8,6 +8,8 @@ from app.utils import Singleton, Point
 class Brush(metaclass=Singleton):
     def __init__(self):
         self.cursor = Qt.ArrowCursor
+        # Whether the canvas may skip mouse moves which came in faster than it can paint them
+        self.compress_moves = True
 
     def mouse_move(self, controller, x: int, y: int, button):
         raise NotImplementedError
@@ -59,6 +61,8 @@ class DotShapeBrush(ShapeBrush):
     def __init__(self):
         super().__init__()
         self._shape_command_class = PrintDotCommand
+        # Every move with pressed button draws a dot, skipping moves would leave gaps in the drawing
+        self.compress_moves = False
 
     def _dot_command(self, controller, x: int, y: int):
         shape_command = self._shape_command_class(controller, x, y, self.color)
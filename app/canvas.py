@@ -1,9 +1,36 @@
+import math
+import time
+from collections import deque
 from typing import Tuple
 
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import QEvent
+from PyQt5.QtCore import QEvent, QTimer, QPoint, QRect, QRectF, Qt
+from PyQt5.QtGui import QGuiApplication, QTransform
 
 from app.brushes import Brush, MoveShapeBrush
+from app.utils import BoundingBox
+
+
+# How far (in pixels) outside of the visible area a shape may start and still be drawn,
+# this covers strokes wider than the shape's geometry (e.g. dots are drawn with 5px wide pen)
+VIEWPORT_MARGIN = 5
+# How many of the latest input-to-paint latencies of mouse moves are kept
+MOVE_LATENCY_SAMPLES = 100
+# Zoom is changed in discrete levels, this many levels double the zoom
+ZOOM_LEVELS_PER_DOUBLING = 4
+MIN_ZOOM_LEVEL = -16
+MAX_ZOOM_LEVEL = 16
+# How far (in pixels) one step of the mouse wheel pans the view
+WHEEL_PAN_PIXELS = 40
+
+
+def frame_interval() -> int:
+    """
+    Time (in ms) between two frames of the primary screen.
+    """
+    screen = QGuiApplication.primaryScreen()
+    refresh_rate = screen.refreshRate() if screen else 0
+    return int(1000 / refresh_rate) if refresh_rate > 0 else 16
 
 
 class Canvas(QtWidgets.QWidget):
@@ -20,6 +47,27 @@ class Canvas(QtWidgets.QWidget):
         self.setMouseTracking(True)
         self.color = (255, 255, 255)
 
+        # Mouse moves are compressed - only the latest pending one is handed to the brush, at most once per frame
+        self._pending_move = None
+        self._move_timer = QTimer(self)
+        self._move_timer.setSingleShot(True)
+        self._move_timer.setInterval(frame_interval())
+        self._move_timer.timeout.connect(self._apply_pending_move)
+        self._paint_requests = 0
+        self._painted_move_time = None
+        self.skipped_moves = 0
+        self.move_latencies = deque(maxlen=MOVE_LATENCY_SAMPLES)
+
+        # Scene is zoomed by 2 ** (zoom_level / ZOOM_LEVELS_PER_DOUBLING) and then moved by the offset (in whole pixels),
+        # i.e. the scene point [x, y] is shown at [x * zoom - offset.x, y * zoom - offset.y] of the canvas
+        self.zoom_level = 0
+        self._offset = QPoint(0, 0)
+        self._pan_position = None
+
+        # Renderer drawing the shapes from some kind of cache (e.g. progressively or by tiles),
+        # None means that all the shapes are drawn directly in every paint event
+        self._renderer = None
+
     def set_brush(self, brush: Brush = MoveShapeBrush()):
         self.brush = brush
         self.brush.color = self.color
@@ -29,19 +77,160 @@ class Canvas(QtWidgets.QWidget):
         self.color = color
         self.brush.color = color
 
+    def _set_renderer(self, renderer_class, enabled: bool):
+        if enabled and not isinstance(self._renderer, renderer_class):
+            if self._renderer is not None:
+                self._renderer.stop()
+            self._renderer = renderer_class(self, self._controller)
+        elif not enabled and isinstance(self._renderer, renderer_class):
+            self._renderer.stop()
+            self._renderer = None
+        self.update()
+
+    def set_progressive(self, enabled: bool = True):
+        # import ProgressiveRenderer this late to avoid import loop
+        from app.progressive_renderer import ProgressiveRenderer
+        self._set_renderer(ProgressiveRenderer, enabled)
+
+    def set_tiled(self, enabled: bool = True):
+        # import TiledRenderer this late to avoid import loop
+        from app.tiled_renderer import TiledRenderer
+        self._set_renderer(TiledRenderer, enabled)
+
+    # --------------------------------------- Zooming and panning ------------------------------------------
+
+    @property
+    def zoom(self) -> float:
+        return 2 ** (self.zoom_level / ZOOM_LEVELS_PER_DOUBLING)
+
+    @property
+    def offset(self) -> QPoint:
+        return QPoint(self._offset)
+
+    def scene_transform(self) -> QTransform:
+        # Maps the scene coordinates to the canvas (widget) coordinates
+        transform = QTransform.fromTranslate(-self._offset.x(), -self._offset.y())
+        transform.scale(self.zoom, self.zoom)
+        return transform
+
+    def map_to_scene(self, x: int, y: int) -> Tuple[int, int]:
+        # Shapes have integer coordinates, so the position is rounded to the nearest scene point
+        return round((x + self._offset.x()) / self.zoom), round((y + self._offset.y()) / self.zoom)
+
+    def zoom_by(self, levels: int, x: int = None, y: int = None):
+        """
+        Zoom in (or out for negative levels) so that the scene point under [x, y] (center of the canvas
+        by default) stays where it is.
+        """
+        zoom_level = min(MAX_ZOOM_LEVEL, max(MIN_ZOOM_LEVEL, self.zoom_level + levels))
+        if zoom_level == self.zoom_level:
+            return
+
+        x = self.width() // 2 if x is None else x
+        y = self.height() // 2 if y is None else y
+        factor = 2 ** ((zoom_level - self.zoom_level) / ZOOM_LEVELS_PER_DOUBLING)
+        self._offset = QPoint(round((self._offset.x() + x) * factor - x), round((self._offset.y() + y) * factor - y))
+        self.zoom_level = zoom_level
+        self.update()
+
+    def pan_by(self, dx: int, dy: int):
+        # Moves the view by given number of pixels, i.e. the scene moves the opposite way
+        self._offset += QPoint(dx, dy)
+        self.update()
+
+    def reset_view(self):
+        self.zoom_level = 0
+        self._offset = QPoint(0, 0)
+        self.update()
+
+    def request_paint(self):
+        self._paint_requests += 1
+        self.update()
+
+    def _apply_pending_move(self):
+        if self._pending_move is None:
+            return
+
+        x, y, buttons, event_time = self._pending_move
+        self._pending_move = None
+        paint_requests = self._paint_requests
+        self.brush.mouse_move(self._controller, x, y, buttons)
+        self.setCursor(self.brush.cursor)
+        if paint_requests != self._paint_requests:
+            # The move has changed the canvas, we'll measure how long it takes until it's painted
+            self._painted_move_time = event_time
+
+    def scene_rect(self, rect: QRect) -> BoundingBox:
+        # Part of the scene shown in given rectangle of the canvas
+        scene = self.scene_transform().inverted()[0].mapRect(QRectF(rect))
+        return BoundingBox(
+            scene.left() - VIEWPORT_MARGIN, scene.top() - VIEWPORT_MARGIN,
+            scene.right() + VIEWPORT_MARGIN, scene.bottom() + VIEWPORT_MARGIN
+        )
+
+    def visible_rect(self) -> BoundingBox:
+        # The canvas lives inside a scroll area, so only part of it may be actually visible
+        return self.scene_rect(self.visibleRegion().boundingRect())
+
     # -------------------------- QWidget overridden methods ----------------------------
 
     # Overriding paintEvent method of QWidget to respond to QEvent.Paint.
     # This method should be the only place from where we draw with QPainter. This means, that the print_* methods
     # should never be called before executing this method!
     def paintEvent(self, event: QEvent.Paint):
-        self._controller.print_all_shapes()
+        start = time.perf_counter()
+        if self._renderer is not None:
+            drawn = self._renderer.paint()
+        else:
+            drawn = len(self._controller.print_all_shapes(viewport=self.visible_rect()))
+        self._controller.frame_painted(time.perf_counter() - start, drawn)
+        if self._painted_move_time is not None:
+            self.move_latencies.append(time.perf_counter() - self._painted_move_time)
+            self._painted_move_time = None
 
     # By default this event is emitted only when some mouse button is pressed and the mouse moves
     def mouseMoveEvent(self, event: QEvent.MouseMove):
-        self.brush.mouse_move(self._controller, event.x(), event.y(), event.buttons())
-        self.setCursor(self.brush.cursor)
+        if self._pan_position is not None:
+            self.pan_by(self._pan_position.x() - event.x(), self._pan_position.y() - event.y())
+            self._pan_position = QPoint(event.x(), event.y())
+            return
+
+        if self._pending_move is not None:
+            self.skipped_moves += 1
+        # Brushes work in the scene coordinates, the position is mapped right away as the view may change
+        self._pending_move = (*self.map_to_scene(event.x(), event.y()), event.buttons(), time.perf_counter())
+
+        if not self.brush.compress_moves:
+            self._apply_pending_move()
+        elif not self._move_timer.isActive():
+            self._move_timer.start()
 
     def mousePressEvent(self, event: QEvent.MouseButtonPress):
-        self.brush.mouse_press(self._controller, event.x(), event.y(), event.buttons())
+        # The press must not overtake a move which came before it
+        self._apply_pending_move()
+        if event.buttons() & Qt.MiddleButton:
+            # Dragging with the middle button pans the view
+            self._pan_position = QPoint(event.x(), event.y())
+            self.setCursor(Qt.ClosedHandCursor)
+            return
+
+        self.brush.mouse_press(self._controller, *self.map_to_scene(event.x(), event.y()), event.buttons())
         self.setCursor(self.brush.cursor)
+
+    def mouseReleaseEvent(self, event: QEvent.MouseButtonRelease):
+        if self._pan_position is not None and not event.buttons() & Qt.MiddleButton:
+            self._pan_position = None
+            self.setCursor(self.brush.cursor)
+
+    def wheelEvent(self, event: QEvent.Wheel):
+        # Wheel with Ctrl zooms around the mouse, otherwise it pans (horizontally with Shift)
+        steps = event.angleDelta().y() / 120
+        if event.modifiers() & Qt.ControlModifier:
+            if steps:
+                # High resolution wheels send fractions of a step, those zoom by one level as well
+                self.zoom_by(int(math.copysign(max(1, round(abs(steps))), steps)), event.x(), event.y())
+        elif event.modifiers() & Qt.ShiftModifier:
+            self.pan_by(-round(steps * WHEEL_PAN_PIXELS), 0)
+        else:
+            self.pan_by(round(event.angleDelta().x() / 120 * -WHEEL_PAN_PIXELS), -round(steps * WHEEL_PAN_PIXELS))
+        event.accept()
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from app.commands import Command
 
@@ -50,5 +50,24 @@ class CommandEngine:
         command = self._pop_redo()
         self._controller.execute_command(command, from_redo=True)
 
+    def checkpoint(self) -> Tuple[int, List[Command]]:
+        """
+        :return: state of the engine to which it can be rolled back later
+        """
+        return len(self._undos), list(self._redos)
+
+    def rollback(self, checkpoint: Tuple[int, List[Command]]):
+        """
+        Reverse and forget all the commands executed since the checkpoint, the redo stack is restored.
+        """
+        undos, redos = checkpoint
+        while len(self._undos) > undos:
+            self._pop_undo().reverse()
+        self._redos = redos
+        if self._redos:
+            self._controller.enable_redo()
+        else:
+            self._controller.disable_redo()
+
     def get_all_commands(self) -> Dict[str, List[Command]]:
         return {'undos': self._undos, 'redos': self._redos}
@@ -1,7 +1,7 @@
 from typing import List, Tuple, Type
 
 from app.shape_factory import ShapeFactory, PointsRectFactory, PointsCircleFactory
-from app.shapes import Dot, Line, Rectangle, Circle, Polyline
+from app.shapes import Shape, Dot, Line, Rectangle, Circle, Polyline
 from app.utils import Point, Color
 
 
@@ -18,6 +18,12 @@ class Command:
     def __str__(self):
         return 'Abstract command, should not be instantiated!'
 
+    def history_text(self) -> str:
+        """
+        :return: text of the command shown in the history (when it wasn't typed by the user)
+        """
+        return str(self)
+
     def __eq__(self, other):
         return self.__class__ == other.__class__ and self.receiver == other.receiver
 
@@ -112,6 +118,70 @@ class PrintCircleCommand(ShapeCommand):
         return self.__str__()
 
 
+# Command creating each type of the shapes
+SHAPE_COMMANDS = {
+    Dot: PrintDotCommand,
+    Line: PrintLineCommand,
+    Polyline: PrintPolylineCommand,
+    Rectangle: PrintRectCommand,
+    Circle: PrintCircleCommand
+}
+
+
+def shape_command(receiver, shape: Shape) -> ShapeCommand:
+    """
+    Create the command which creates given shape (the shape itself is used, it isn't created again).
+    """
+    command_class = SHAPE_COMMANDS[type(shape)]
+    command = command_class.__new__(command_class)
+    ShapeCommand.__init__(command, receiver)
+    command.shape = shape
+    return command
+
+
+class LoadedShapesCommand(Command):
+    """
+    Shapes loaded from a file (e.g. consecutive lines of a loaded script), added to the scene (and undone) at once.
+    """
+
+    def __init__(self, receiver, shapes: List[Shape], text: str = None, file: str = None):
+        """
+        :param text: commands creating the shapes, one per line (they are created from the shapes if not given)
+        :param file: binary scene the shapes come from, only the file (not every shape) is shown in the history
+        """
+        super().__init__(receiver)
+        self.shapes = shapes
+        self._text = text
+        self.file = file
+
+    def execute(self):
+        if self.file is None:
+            self.receiver.add_loaded_shapes(self.shapes)
+        else:
+            self.receiver.add_loaded_shapes(self.shapes, summary=f'{len(self.shapes)} shapes loaded')
+
+    def reverse(self):
+        self.receiver.remove_last_shapes(len(self.shapes))
+        if self.file is None:
+            # Every shape has its command and the shape itself in the history
+            self.receiver.delete_from_history(2 * len(self.shapes))
+        else:
+            self.receiver.delete_from_history(2)
+
+    def history_text(self) -> str:
+        if self.file is None:
+            return str(self)
+        return f'load {self.file}'
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self.shapes == other.shapes
+
+    def __str__(self):
+        if self._text is None:
+            self._text = '\n'.join(str(shape_command(self.receiver, shape)) for shape in self.shapes)
+        return self._text
+
+
 # -------------------------------------------------- Other commands ---------------------------------------------------
 
 
@@ -196,6 +266,25 @@ class ListShapeCommand(Command):
             return 'ls'
 
 
+class StatsCommand(Command):
+    def __init__(self, receiver, topic: str):
+        super().__init__(receiver)
+        self.topic = topic
+        self.printed = 0
+
+    def execute(self):
+        self.printed = self.receiver.print_stats(self.topic)
+
+    def reverse(self):
+        self.receiver.delete_from_history(self.printed + 1)
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self.topic == other.topic
+
+    def __str__(self):
+        return f'stats {self.topic}'
+
+
 class SaveCommand(Command):
     def __init__(self, receiver, file: str = None):
         super().__init__(receiver)
@@ -0,0 +1,71 @@
+import bz2
+import gzip
+import lzma
+import shutil
+import tempfile
+import zlib
+from typing import IO
+
+
+# Compressed files are recognized by the extension behind the usual one (e.g. "scene.txt.gz")
+CODECS = {
+    '.gz': gzip,
+    '.bz2': bz2,
+    '.xz': lzma,
+    '.lzma': lzma,
+}
+# Errors raised when a compressed file is corrupted (bz2 reports it by a plain OSError only)
+CODEC_ERRORS = (gzip.BadGzipFile, EOFError, zlib.error, lzma.LZMAError)
+# Size of the blocks in which the files are decompressed
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def codec_of(path: str):
+    """
+    :return: module compressing files with given path (None if they are not compressed)
+    """
+    for extension, codec in CODECS.items():
+        if path.lower().endswith(extension):
+            return codec
+    return None
+
+
+def strip_codec_extension(path: str) -> str:
+    """
+    :return: the path without the extension of the compression (e.g. "scene.txt" for "scene.txt.gz")
+    """
+    for extension in CODECS:
+        if path.lower().endswith(extension):
+            return path[:-len(extension)]
+    return path
+
+
+def open_file(path: str, mode: str, encoding: str = None) -> IO:
+    """
+    Open the file, which is (de)compressed on the fly if its extension says so. Nothing is held
+    in the memory, the data are compressed (or decompressed) as they are written (or read).
+    """
+    codec = codec_of(path)
+    if codec is None:
+        return open(path, mode, encoding=encoding)
+    return codec.open(path, mode, encoding=encoding)
+
+
+def decompressed(path: str) -> IO[bytes]:
+    """
+    :return: binary file with the decompressed content of given file, which is decompressed into a temporary file
+    (deleted when closed) block by block if it's compressed
+    """
+    codec = codec_of(path)
+    if codec is None:
+        return open(path, 'rb')
+
+    temporary = tempfile.TemporaryFile()
+    try:
+        with codec.open(path, 'rb') as f:
+            shutil.copyfileobj(f, temporary, COPY_CHUNK_SIZE)
+    except BaseException:
+        temporary.close()
+        raise
+    temporary.seek(0)
+    return temporary
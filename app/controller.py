@@ -1,36 +1,70 @@
-from typing import List, Dict
+from contextlib import contextmanager
+from typing import List, Dict, Iterable
 
 from app.command_engine import CommandEngine
-from app.commands import Command
+from app.commands import Command, ShapeCommand, LoadedShapesCommand
+from app.compression import open_file, CODEC_ERRORS
 from app.gui import MainWindow
-from app.printers import CanvasPrinter, Printer
+from app.history import HISTORY_CAP
+from app.pick_buffer import PickBuffer
+from app.printers import CanvasPrinter, BatchCanvasPrinter, Printer
+from app.render_stats import RenderStats, SLOW_FRAME_THRESHOLD
+from app.scene_file import is_scene_file, save_scene, SceneFormatError, MappedScene, MappedShapes
 from app.shapes import Shape
 from app.shapes_store import ShapesStore
-from app.utils import Point
+from app.utils import Point, BoundingBox
 from app.parsers.color_parser import RgbColorParser
 
 
+# Errors of reading a file which is being loaded
+LOAD_ERRORS = (OSError, UnicodeDecodeError) + CODEC_ERRORS
+
+
 class Controller:
     """
     Main class of this application. Holds all crucial pieces together.
     It represents an observer in the observer design pattern.
     """
 
-    def __init__(self):
-        self._gui = MainWindow(self)
+    def __init__(self, batch_printing: bool = True, slow_frame_threshold: float = SLOW_FRAME_THRESHOLD,
+                 pick_buffer: bool = True, history_cap: int = HISTORY_CAP, parse_cache_size: int = None):
+        """
+        :param parse_cache_size: number of command lines remembered by the parser, None for the default
+        """
+        self._gui = MainWindow(self, history_cap)
         self._command_engine = CommandEngine(self)
-        self._printer = CanvasPrinter(self._gui.canvas)
+        self._render_stats = RenderStats(slow_frame_threshold)
+        if batch_printing:
+            self._printer = BatchCanvasPrinter(self._gui.canvas)
+        else:
+            self._printer = CanvasPrinter(self._gui.canvas)
         self._shapes = ShapesStore(self)
+        # Speeds up hit-testing (in the GUI) of points where there are no shapes
+        self._pick_buffer = PickBuffer() if pick_buffer else None
 
-        # import CliParser this late to avoid import loop
-        from app.parsers.cli_parser import CliParser
-        self._cli_parser = CliParser(self, RgbColorParser())
+        # import the parser this late to avoid import loop
+        from app.parsers.table_parser import TableCliParser, PARSE_CACHE_SIZE
+        if parse_cache_size is None:
+            parse_cache_size = PARSE_CACHE_SIZE
+        self._cli_parser = TableCliParser(self, RgbColorParser(), cache_size=parse_cache_size)
+
+        # While a batch is running, repainting, history and undo/redo buttons are updated only at its end
+        self._batch_depth = 0
+        self._batch_history = []
+        self._batch_update = False
 
     def add_shapes(self, *shapes: Shape):
         for shape in shapes:
             self.print_to_history(str(shape))
         self._shapes.add_shapes(*shapes)
 
+    def add_loaded_shapes(self, shapes: List[Shape], summary: str = None):
+        """
+        :param summary: printed to the history instead of all the shapes
+        """
+        self.print_to_history(summary or '\n'.join(str(shape) for shape in shapes))
+        self._shapes.add_loaded_shapes(shapes)
+
     def move_shapes(self, move_from: Point, move_to: Point, divergence: bool = False) -> Dict[str, List[Shape]]:
         return self._shapes.move_shapes(move_from, move_to, divergence)
 
@@ -41,6 +75,9 @@ class Controller:
     def remove_last_shape(self):
         self._shapes.remove_last_shape()
 
+    def remove_last_shapes(self, number_of_shapes: int):
+        self._shapes.remove_last_shapes(number_of_shapes)
+
     def remove_shapes_at(self, point: Point, divergence: bool = False) -> Dict[str, List[Shape]]:
         return self._shapes.remove_shapes_at(point, divergence)
 
@@ -55,31 +92,140 @@ class Controller:
         self.execute_command(command, command_text=command_text)
 
     def execute_command(self, command: Command, from_redo: bool = False, command_text: str = None):
-        history_line = ' > ' + (command_text or str(command))
-        self._gui.print_lines_to_history(history_line)
+        # Every line of the command (there can be more of them) is marked in the history
+        history_line = ' > ' + (command_text or command.history_text()).replace('\n', '\n > ')
+        self.print_to_history(history_line)
         self._command_engine.execute_command(command, from_redo=from_redo)
 
+    @contextmanager
+    def batch(self):
+        """
+        Execute many commands at once. The scene is repainted, the lines are added to the history
+        and the undo/redo buttons are updated only once, when the (outermost) batch ends.
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._end_batch()
+
+    def _end_batch(self):
+        if self._batch_history:
+            self._gui.print_lines_to_history('\n'.join(self._batch_history))
+            self._batch_history = []
+
+        commands = self._command_engine.get_all_commands()
+        if commands['undos']:
+            self._gui.enable_undo()
+        else:
+            self._gui.disable_undo()
+        if commands['redos']:
+            self._gui.enable_redo()
+        else:
+            self._gui.disable_redo()
+
+        if self._batch_update:
+            self._batch_update = False
+            self.update()
+
     def remove_last_command(self):
         self._command_engine.remove_last_command()
 
     def print_to_history(self, lines: str):
-        self._gui.print_lines_to_history(lines)
+        if self._batch_depth:
+            self._batch_history.extend(lines.split('\n'))
+        else:
+            self._gui.print_lines_to_history(lines)
 
     def delete_from_history(self, number_of_lines: int = 1):
+        if self._batch_depth:
+            # Lines of the batch aren't in the history yet
+            pending = min(number_of_lines, len(self._batch_history))
+            del self._batch_history[len(self._batch_history) - pending:]
+            number_of_lines -= pending
+            if number_of_lines == 0:
+                return
         self._gui.delete_from_history(number_of_lines)
 
     def shapes_at(self, point: Point = None, divergence: bool = False) -> List[Shape]:
+        # Shapes of a mapped scene are picked by their records, so they don't have to be created for the pick buffer
+        if point and divergence and self._pick_buffer is not None and not self._shapes.is_mapped():
+            self._pick_buffer.sync(self._shapes)
+            if self._pick_buffer.enabled and self._pick_buffer.pick(point) is None:
+                # Single pixel of the pick buffer says there's nothing, no need to check the geometry of all shapes
+                return []
         return self._shapes.shapes_at(point, divergence)
 
     def print_shapes_to_history(self, point: Point):
         for shape in self.shapes_at(point):
             self.print_to_history(str(shape))
 
-    def print_all_shapes(self, printer: Printer = None) -> List[Shape]:
-        return self._shapes.print_all(printer or self._printer)
+    def print_all_shapes(self, printer: Printer = None, viewport: BoundingBox = None) -> List[Shape]:
+        return self._shapes.print_all(printer or self._printer, viewport=viewport)
+
+    def print_shapes_chunk(self, printer: Printer, start: int, viewport: BoundingBox, deadline: float) -> int:
+        return self._shapes.print_chunk(printer, start, viewport, deadline)
+
+    def print_preview(self, printer: Printer = None):
+        self._shapes.print_preview(printer or self._printer)
+
+    def scene_generation(self) -> int:
+        return self._shapes.generation
+
+    def culled_shapes(self) -> int:
+        return self._shapes.culled
+
+    def frame_painted(self, frame_time: float, drawn: int):
+        self._render_stats.record_frame(
+            frame_time, drawn, self._shapes.culled, self._printer.state_changes, len(self._shapes.shapes_at())
+        )
+        self._printer.state_changes = 0
+        self._gui.show_fps(self._render_stats.fps())
+
+    def print_stats(self, topic: str) -> int:
+        if topic == 'render':
+            lines = self._render_stats.summary()
+            canvas = self._gui.canvas
+            if canvas.move_latencies:
+                latency = sum(canvas.move_latencies) / len(canvas.move_latencies) * 1000
+                lines.append(
+                    f'Mouse moves: {canvas.skipped_moves} skipped, avg input-to-paint latency {latency:.2f} ms'
+                )
+            else:
+                lines.append(f'Mouse moves: {canvas.skipped_moves} skipped')
+            if isinstance(self._printer, CanvasPrinter):
+                display_lists = self._printer.display_lists
+                lookups = display_lists.hits + display_lists.misses
+                hit_ratio = display_lists.hits / lookups * 100 if lookups else 0
+                lines.append(
+                    f'Display lists: {len(display_lists)} cached ({display_lists.size / 1024:.1f} kB), '
+                    f'hit ratio {hit_ratio:.1f} %'
+                )
+        elif topic == 'parser':
+            parser = self._cli_parser
+            if parser.cache_size > 0:
+                lookups = parser.hits + parser.misses
+                hit_ratio = parser.hits / lookups * 100 if lookups else 0
+                lines = [
+                    f'Parse cache: {len(parser)} of {parser.cache_size} lines cached, '
+                    f'hit ratio {hit_ratio:.1f} % ({parser.hits} hits, {parser.misses} misses)'
+                ]
+            else:
+                lines = ['Parse cache: disabled']
+        else:
+            raise ValueError(f'Unknown statistics: {topic}')
+
+        for line in lines:
+            self.print_to_history(line)
+        return len(lines)
 
     def update(self):
-        self._printer.update(self)
+        if self._batch_depth:
+            self._batch_update = True
+        else:
+            self._printer.update(self)
 
     def undo(self):
         self._command_engine.undo()
@@ -88,16 +234,20 @@ class Controller:
         self._command_engine.redo()
 
     def enable_undo(self):
-        self._gui.enable_undo()
+        if not self._batch_depth:
+            self._gui.enable_undo()
 
     def enable_redo(self):
-        self._gui.enable_redo()
+        if not self._batch_depth:
+            self._gui.enable_redo()
 
     def disable_undo(self):
-        self._gui.disable_undo()
+        if not self._batch_depth:
+            self._gui.disable_undo()
 
     def disable_redo(self):
-        self._gui.disable_redo()
+        if not self._batch_depth:
+            self._gui.disable_redo()
 
     def save_dialog(self, path_to_file: str):
         self._gui.save_dialog(path_to_file)
@@ -106,22 +256,81 @@ class Controller:
         self._gui.load_dialog(path_to_file)
 
     def save(self, file: str):
-        commands = self._command_engine.get_all_commands()
-        with open(file, 'w+', encoding='utf-8') as f:
-            [f.write(str(c) + '\n') for c in commands['undos']]
+        if is_scene_file(file):
+            # Binary scene contains only the shapes, not the commands which created them
+            try:
+                save_scene(file, self._shapes.shapes_at())
+            except SceneFormatError as e:
+                self._gui.set_status(f'File not saved: {e}')
+                return
+        else:
+            commands = self._command_engine.get_all_commands()
+            with open_file(file, 'wt', encoding='utf-8') as f:
+                [f.write(str(c) + '\n') for c in commands['undos']]
 
         self._gui.set_status('File saved!')
 
     def load(self, file: str):
-        with open(file, 'r', encoding='utf-8') as f:
-            # Getting rid of the newline `\n` at the end of every line
-            commands = [line[:-1] for line in f.readlines()]
-            for command_text in commands:
-                command = self._cli_parser.parse_input(command_text)
-                self.execute_command(command, command_text=command_text)
+        if is_scene_file(file):
+            self._load_scene(file)
+        else:
+            self._load_script(file)
+
+    def _load_scene(self, file: str):
+        try:
+            # Shapes are read from the mapped file only when they are shown (or searched for)
+            shapes = MappedShapes(MappedScene(file))
+        except (SceneFormatError, OSError) as e:
+            self._gui.set_status(f'File not loaded: {e}')
+            return
+
+        if shapes:
+            with self.batch():
+                self.execute_command(LoadedShapesCommand(self, shapes, file=file))
+        self._gui.set_status('File loaded!')
+
+    def _load_script(self, file: str):
+        checkpoint = self._command_engine.checkpoint()
+        try:
+            # Lines are read (and decompressed) one by one, so even huge files don't need to fit into the memory
+            with open_file(file, 'rt', encoding='utf-8') as f, self.batch():
+                try:
+                    self._execute_script(f)
+                except LOAD_ERRORS:
+                    # Commands of a file which can't be read to its end are taken back, so the scene stays as it was
+                    self._command_engine.rollback(checkpoint)
+                    raise
+        except LOAD_ERRORS as e:
+            self._gui.set_status(f'File not loaded: {e}')
+            return
 
         self._gui.set_status('File loaded!')
 
+    def _execute_script(self, lines: Iterable[str]):
+        # Consecutive shapes are added to the scene at once, only the other commands (e.g. "move"
+        # which depends on the shapes loaded so far) are executed one by one
+        shape_commands = []
+        shape_lines = []
+        for line in lines:
+            # Getting rid of the newline `\n` at the end of every line
+            command_text = line.rstrip('\n')
+            command = self._cli_parser.parse_input(command_text)
+            if isinstance(command, ShapeCommand):
+                shape_commands.append(command)
+                shape_lines.append(command_text)
+            else:
+                self._execute_loaded_shapes(shape_commands, shape_lines)
+                shape_commands, shape_lines = [], []
+                self.execute_command(command, command_text=command_text)
+        self._execute_loaded_shapes(shape_commands, shape_lines)
+
+    def _execute_loaded_shapes(self, commands: List[ShapeCommand], lines: List[str]):
+        if len(commands) == 1:
+            self.execute_command(commands[0], command_text=lines[0])
+        elif commands:
+            # The lines themselves are kept, so they are shown in the history (and saved) as they were
+            self.execute_command(LoadedShapesCommand(self, [command.shape for command in commands], '\n'.join(lines)))
+
     def run_app(self):
         # Run the whole app
         self._gui.show()
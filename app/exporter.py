@@ -0,0 +1,124 @@
+import struct
+import zlib
+from typing import BinaryIO
+
+from PyQt5.QtCore import QRect, QRectF
+from PyQt5.QtGui import QImage
+
+from app.controller import Controller
+from app.printers import ImagePrinter, region_transform
+from app.utils import BoundingBox
+
+
+# Maximal number of pixels rendered at once, the output image is rendered in horizontal strips of this size
+TILE_PIXELS = 4096 * 1024
+# Number of extra rows rendered above and below every strip. Qt rounds edges of shapes cut by the image border
+# differently, so the strips are rendered a bit bigger and the rows near their borders are thrown away
+STRIP_OVERLAP = 64
+
+
+class HeadlessController(Controller):
+    """
+    Controller which never shows its GUI, so it can be used to execute command scripts in batch jobs.
+    Dialogs that would wait for the user are answered right away.
+    """
+
+    def clear_dialog(self) -> bool:
+        return True
+
+    def save_dialog(self, path_to_file: str):
+        if path_to_file:
+            self.save(path_to_file)
+
+    def load_dialog(self, path_to_file: str):
+        if path_to_file:
+            self.load(path_to_file)
+
+    def scene_bounding_box(self) -> BoundingBox:
+        boxes = [shape.bounding_box() for shape in self.shapes_at(None)]
+        if not boxes:
+            raise ValueError('There are no shapes in the scene!')
+        return BoundingBox(
+            min(box.left for box in boxes), min(box.top for box in boxes),
+            max(box.right for box in boxes), max(box.bottom for box in boxes)
+        )
+
+
+class PngStreamWriter:
+    """
+    Writes an RGBA PNG image row by row, so the whole image never has to be held in memory.
+    """
+
+    def __init__(self, stream: BinaryIO, width: int, height: int):
+        self._stream = stream
+        self._width = width
+        self._height = height
+        self._rows_written = 0
+        self._compressor = zlib.compressobj()
+
+        self._stream.write(b'\x89PNG\r\n\x1a\n')
+        # 8 bits per channel, color type 6 (RGBA), default compression, filtering and no interlace
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes):
+        self._stream.write(struct.pack('>I', len(data)))
+        self._stream.write(chunk_type)
+        self._stream.write(data)
+        self._stream.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type))))
+
+    def write_rows(self, image: QImage):
+        if image.width() != self._width or self._rows_written + image.height() > self._height:
+            raise ValueError('Given rows do not fit into the image!')
+
+        image = image.convertToFormat(QImage.Format_RGBA8888)
+        bits = image.constBits()
+        bits.setsize(image.bytesPerLine() * image.height())
+        data = bytes(bits)
+
+        row_length = self._width * 4
+        raw = bytearray()
+        for row in range(image.height()):
+            start = row * image.bytesPerLine()
+            # Every row starts with the filter type, 0 means no filter
+            raw += b'\x00'
+            raw += data[start:start + row_length]
+        compressed = self._compressor.compress(bytes(raw))
+        if compressed:
+            self._write_chunk(b'IDAT', compressed)
+        self._rows_written += image.height()
+
+    def close(self):
+        if self._rows_written != self._height:
+            raise ValueError(f'Only {self._rows_written} of {self._height} rows were written!')
+
+        self._write_chunk(b'IDAT', self._compressor.flush())
+        self._write_chunk(b'IEND', b'')
+
+
+class SceneExporter:
+    """
+    Renders a region of the scene into a PNG file. Big images are rendered in horizontal strips,
+    so only one strip is in memory at a time.
+    """
+
+    def __init__(self, controller: Controller, tile_pixels: int = TILE_PIXELS):
+        self._controller = controller
+        self._tile_pixels = tile_pixels
+
+    def export(self, file: str, region: QRectF, width: int, height: int):
+        if width <= 0 or height <= 0 or region.width() <= 0 or region.height() <= 0:
+            raise ValueError('Both the image and the exported region must not be empty!')
+
+        rows_per_strip = max(1, self._tile_pixels // width)
+        with open(file, 'wb') as f:
+            writer = PngStreamWriter(f, width, height)
+            for first_row in range(0, height, rows_per_strip):
+                rows = min(rows_per_strip, height - first_row)
+                top = max(0, first_row - STRIP_OVERLAP)
+                bottom = min(height, first_row + rows + STRIP_OVERLAP)
+                strip = QImage(width, bottom - top, QImage.Format_RGBA8888)
+                # The whole picture is shifted up, so that just the current strip lands in the image
+                transform = region_transform(region, QRect(0, -top, width, height))
+                ImagePrinter(strip, transform).update(self._controller)
+                writer.write_rows(strip.copy(0, first_row - top, width, rows))
+            writer.close()
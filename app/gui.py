@@ -1,15 +1,28 @@
 import getpass
 
 from PyQt5 import QtWidgets
-from PyQt5.QtGui import QColor, QTextCursor
+from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QColorDialog, QFileDialog
 
 from app.commands import ClearCommand, SaveCommand, LoadCommand, QuitCommand
 from app.ui.main_window import Ui_MainWindow
 from app.ui.clear_dialog import Ui_clearDialog
 from app.canvas import Canvas
+from app.history import HistoryModel, HistoryView, HISTORY_CAP
 from app.brushes import LineShapeBrush, RectShapeBrush, CircleShapeBrush, DotShapeBrush, PolylineShapeBrush, \
     RemoveShapeBrush, Brush, MoveShapeBrush
+from app.compression import CODECS
+from app.scene_file import is_scene_file, SCENE_EXTENSION
+
+
+def _patterns(extension: str) -> str:
+    # Files with given extension, both plain and compressed
+    return ' '.join(f'*{extension}{codec_extension}' for codec_extension in [''] + list(CODECS))
+
+
+# Filters of the file dialogs, binary scenes (and compressed files) are saved and loaded by their extension
+SCENE_FILTER = f'Binary scenes ({_patterns(SCENE_EXTENSION)})'
+FILE_FILTERS = ';;'.join([f'Command scripts ({_patterns(".txt")})', SCENE_FILTER, 'All files (*)'])
 
 
 class ClearDialog(QtWidgets.QDialog):
@@ -32,7 +45,7 @@ class ClearDialog(QtWidgets.QDialog):
 
 
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self, controller):
+    def __init__(self, controller, history_cap: int = HISTORY_CAP):
         super().__init__()
         self._controller = controller
 
@@ -41,6 +54,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self._ui.setupUi(self)
         self.set_status()
 
+        # History is shown in a bounded, virtualized list instead of the text browser from the generated UI
+        self._history = HistoryModel(history_cap)
+        history_view = HistoryView(self._history, self._ui.verticalLayoutWidget)
+        history_view.setStyleSheet('border: 1px solid silver;')
+        history_view.setObjectName('history')
+        self._ui.verticalLayout_2.replaceWidget(self._ui.history, history_view)
+        self._ui.history.deleteLater()
+        self._ui.history = history_view
+
         self.canvas = Canvas(controller)
 
         # Menu buttons
@@ -103,6 +125,43 @@ class MainWindow(QtWidgets.QMainWindow):
         self._ui.canvasHolder.setWidget(self.canvas)
         self._ui.canvasHolder.setStyleSheet('background-color: white')
 
+        # Optional FPS readout in the status bar
+        self._fps_label = QtWidgets.QLabel()
+        self._fps_label.setVisible(False)
+        self.statusBar().addPermanentWidget(self._fps_label)
+        view_menu = self._ui.menubar.addMenu('&View')
+        self.action_show_fps = view_menu.addAction('Show &FPS')
+        self.action_show_fps.setCheckable(True)
+        self.action_show_fps.toggled.connect(
+            lambda checked: self._fps_label.setVisible(checked)
+        )
+        self.action_progressive = view_menu.addAction('&Progressive rendering')
+        self.action_progressive.setCheckable(True)
+        self.action_progressive.toggled.connect(
+            lambda checked: self._toggle_renderer(self.canvas.set_progressive, self.action_tiled, checked)
+        )
+        self.action_tiled = view_menu.addAction('&Tiled rendering')
+        self.action_tiled.setCheckable(True)
+        self.action_tiled.toggled.connect(
+            lambda checked: self._toggle_renderer(self.canvas.set_tiled, self.action_progressive, checked)
+        )
+        view_menu.addSeparator()
+        self.action_zoom_in = view_menu.addAction('Zoom &in')
+        self.action_zoom_in.setShortcut('Ctrl++')
+        self.action_zoom_in.triggered.connect(
+            lambda: self.canvas.zoom_by(1)
+        )
+        self.action_zoom_out = view_menu.addAction('Zoom &out')
+        self.action_zoom_out.setShortcut('Ctrl+-')
+        self.action_zoom_out.triggered.connect(
+            lambda: self.canvas.zoom_by(-1)
+        )
+        self.action_reset_view = view_menu.addAction('&Reset view')
+        self.action_reset_view.setShortcut('Ctrl+0')
+        self.action_reset_view.triggered.connect(
+            lambda: self.canvas.reset_view()
+        )
+
     # ------------------------------------------------ Handlers -------------------------------------------------------
 
     def _handle_action_new(self):
@@ -117,6 +176,12 @@ class MainWindow(QtWidgets.QMainWindow):
         command = LoadCommand(self._controller)
         self._controller.execute_command(command)
 
+    def _toggle_renderer(self, set_renderer, other_action: QtWidgets.QAction, checked: bool):
+        set_renderer(checked)
+        if checked:
+            # Only one renderer can be used at a time
+            other_action.setChecked(False)
+
     def _toggle_brush(self, brush: Brush):
         if self.canvas.brush != MoveShapeBrush():
             # Un-checking the previous brush button
@@ -162,7 +227,9 @@ class MainWindow(QtWidgets.QMainWindow):
         # Save file dialog will open and returns tuple (name of the saved file, type)
         user = getpass.getuser()
         path = path_to_file or f'/home/{user}/untitled.txt'
-        name, _ = QFileDialog().getSaveFileName(self, 'Save File', path)
+        name, file_filter = QFileDialog().getSaveFileName(self, 'Save File', path, FILE_FILTERS)
+        if name and file_filter == SCENE_FILTER and not is_scene_file(name):
+            name += SCENE_EXTENSION
         if name:
             self._controller.save(name)
 
@@ -170,10 +237,13 @@ class MainWindow(QtWidgets.QMainWindow):
         # Load file dialog will open and returns tuple (name of the loaded file, type)
         user = getpass.getuser()
         path = path_to_file or f'/home/{user}/untitled.txt'
-        name, _ = QFileDialog().getOpenFileName(self, 'Load File', path)
+        name, _ = QFileDialog().getOpenFileName(self, 'Load File', path, FILE_FILTERS)
         if name:
             self._controller.load(name)
 
+    def show_fps(self, fps: int):
+        self._fps_label.setText(f'{fps} FPS')
+
     def enable_undo(self):
         self._ui.actionUndo.setEnabled(True)
 
@@ -187,20 +257,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self._ui.actionRedo.setEnabled(False)
 
     def print_lines_to_history(self, lines: str):
-        self._ui.history.append(lines)
+        self._history.append(lines)
 
     def delete_from_history(self, number_of_lines: int = 1):
-        history = self._ui.history.toPlainText()
-        history = history.split('\n')
-
-        if number_of_lines > len(history):
-            raise ValueError
-
-        history = history[:(-number_of_lines)]
-        history = '\n'.join(history)
-        self._ui.history.setText(history)
-        self._ui.history.moveCursor(QTextCursor.End)
-        self._ui.history.ensureCursorVisible()
+        self._history.remove_last(number_of_lines)
 
     def clear_history(self):
-        self._ui.history.setText('')
+        self._history.clear()
@@ -0,0 +1,138 @@
+import tempfile
+from array import array
+from collections import deque
+from typing import List
+
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+from PyQt5.QtGui import QKeySequence, QKeyEvent
+
+
+# Number of the latest history lines kept in memory, older lines are moved to the on-disk log
+HISTORY_CAP = 10000
+
+
+class HistoryModel(QAbstractListModel):
+    """
+    Lines of the command history. Only the latest `cap` lines are kept in memory (in a ring buffer),
+    older lines are moved to a temporary log file and read back only when they are shown, so both
+    memory and the cost of appending stay flat no matter how long the history is.
+    """
+
+    def __init__(self, cap: int = HISTORY_CAP):
+        super().__init__()
+        if cap < 1:
+            raise ValueError('History must keep at least one line in memory!')
+        self._lines = deque(maxlen=cap)
+        # Lines [0, _first) are in the log, lines [_first, rowCount()) in memory
+        self._first = 0
+        # Log is created when the first line is moved out of memory, offsets are positions of the logged lines
+        self._log = None
+        self._offsets = array('q')
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._first + len(self._lines)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return self.line(index.row())
+
+    def line(self, row: int) -> str:
+        if row >= self._first:
+            return self._lines[row - self._first]
+
+        self._log.seek(self._offsets[row])
+        return self._log.readline().decode('utf-8').rstrip('\n')
+
+    def lines(self) -> List[str]:
+        return [self.line(row) for row in range(self.rowCount())]
+
+    def _move_to_log(self, lines: List[str]):
+        if self._log is None:
+            self._log = tempfile.TemporaryFile()
+        self._log.seek(0, 2)
+        offset = self._log.tell()
+        data = []
+        for line in lines:
+            self._offsets.append(offset)
+            encoded = line.encode('utf-8') + b'\n'
+            offset += len(encoded)
+            data.append(encoded)
+        self._log.write(b''.join(data))
+        self._first += len(lines)
+
+    def append(self, lines: str):
+        new_lines = lines.split('\n')
+        rows = self.rowCount()
+        self.beginInsertRows(QModelIndex(), rows, rows + len(new_lines) - 1)
+        # Lines which don't fit into the memory anymore are moved to the log at once
+        overflow = len(self._lines) + len(new_lines) - self._lines.maxlen
+        if overflow > 0:
+            from_memory = min(overflow, len(self._lines))
+            logged = [self._lines.popleft() for _ in range(from_memory)]
+            logged += new_lines[:overflow - from_memory]
+            self._move_to_log(logged)
+            new_lines = new_lines[overflow - from_memory:]
+        self._lines.extend(new_lines)
+        self.endInsertRows()
+
+    def remove_last(self, number_of_lines: int):
+        rows = self.rowCount()
+        if number_of_lines > rows:
+            raise ValueError(f'There are only {rows} lines in the history!')
+        if number_of_lines <= 0:
+            return
+
+        self.beginRemoveRows(QModelIndex(), rows - number_of_lines, rows - 1)
+        for _ in range(min(number_of_lines, len(self._lines))):
+            self._lines.pop()
+        if rows - number_of_lines < self._first:
+            # Removing also some of the logged lines, the log is simply cut off
+            self._first = rows - number_of_lines
+            self._log.truncate(self._offsets[self._first])
+            del self._offsets[self._first:]
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._lines.clear()
+        self._first = 0
+        self._offsets = array('q')
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        self.endResetModel()
+
+
+class HistoryView(QtWidgets.QListView):
+    """
+    Shows the history lines. All rows have the same height, so the view lays out and paints only the rows
+    which are visible, no matter how many lines there are.
+    """
+
+    def __init__(self, model: HistoryModel, parent: QtWidgets.QWidget = None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setUniformItemSizes(True)
+        self.setWordWrap(False)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+
+        # Scrolling makes the view lay out its rows, so it's done once after a batch of appended lines
+        self._scroll_timer = QTimer(self)
+        self._scroll_timer.setSingleShot(True)
+        self._scroll_timer.setInterval(0)
+        self._scroll_timer.timeout.connect(self.scrollToBottom)
+        model.rowsInserted.connect(lambda: self._scroll_timer.start())
+
+    def toPlainText(self) -> str:
+        # Same as with the text browser which used to show the history
+        return '\n'.join(self.model().lines())
+
+    def keyPressEvent(self, event: QKeyEvent):
+        if event.matches(QKeySequence.Copy):
+            rows = sorted(index.row() for index in self.selectedIndexes())
+            QtWidgets.QApplication.clipboard().setText('\n'.join(self.model().line(row) for row in rows))
+        else:
+            super().keyPressEvent(event)
@@ -1,5 +1,5 @@
 from app.parsers.command_parsers import CommandParser, RemoveShapeParser, ListParser, ClearParser, \
-    RectParser, CircleParser, DotParser, LineParser, MoveShapeParser, SaveParser, LoadParser, QuitParser
+    RectParser, CircleParser, DotParser, LineParser, MoveShapeParser, SaveParser, LoadParser, QuitParser, StatsParser
 from app.controller import Controller
 from app.parsers.color_parser import ColorParser
 from app.parsers.low_level_parsers import NatParser, WordParser
@@ -18,6 +18,7 @@ class CliParser:
         self.width_parser = NatParser(' ')
         self.height_parser = NatParser()
         self.radius_parser = NatParser()
+        self.word_parser = WordParser()
 
         self.command_parsers = {
             'remove': RemoveShapeParser(controller),
@@ -26,6 +27,7 @@ class CliParser:
             'load': LoadParser(controller),
             'quit': QuitParser(controller),
             'ls': ListParser(controller),
+            'stats': StatsParser(controller),
             'clear': ClearParser(controller),
             'rect': RectParser(controller, self.width_parser, self.height_parser, self.color_parser),
             'circle': CircleParser(controller, self.radius_parser, self.color_parser),
@@ -43,8 +45,7 @@ class CliParser:
         InvalidCommand otherwise
         """
         # Parsing the first word -> this will be used as a key to the dictionary with respective parsers
-        word_parser = WordParser()
-        command_result = word_parser.parse_input(cli_input)
+        command_result = self.word_parser.parse_input(cli_input)
 
         if command_result.is_successful() and command_result.get_match() in self.command_parsers:
             command_parser = self.command_parsers[command_result.get_match()]
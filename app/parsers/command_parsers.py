@@ -2,17 +2,21 @@ import abc
 from builtins import NotImplementedError
 
 from app.parsers.parse_results import ParseResult, Success, Failure
-from app.parsers.low_level_parsers import NatParser
+from app.parsers.low_level_parsers import NatParser, WordParser
 from app.parsers.point_parsers import PointParser, AbsoluteParserPoint
 from app.parsers.color_parser import ColorParser
 from app.shape_factory import DimensionsRectFactory, DimensionsCircleFactory
 from app.commands import PrintDotCommand, PrintRectCommand, PrintCircleCommand, PrintLineCommand, \
     PrintPolylineCommand, MoveShapeCommand, RemoveShapeCommand, ListShapeCommand, LoadCommand, SaveCommand, \
-    ClearCommand, QuitCommand, Command
+    ClearCommand, QuitCommand, StatsCommand, Command
 from app.utils import Color
 from app.controller import Controller
 
 
+# Topics of the "stats" command
+STATS_TOPICS = ['render', 'parser']
+
+
 class CommandParser:
     """
     Parses command from CLI input.
@@ -45,9 +49,9 @@ class CommandParser:
         """
         Parse two Points from given input.
         """
-        point_result1 = PointParser().parse_point(cli_input)
+        point_result1 = PointParser.parse_point(cli_input)
         if point_result1.is_successful():
-            point_result2 = PointParser().parse_point(point_result1.get_remainder())
+            point_result2 = PointParser.parse_point(point_result1.get_remainder())
             if point_result2.is_successful():
                 return Success([point_result1.get_match(), point_result2.get_match()], point_result2.get_remainder())
 
@@ -158,7 +162,7 @@ class RemoveShapeParser(CommandParser):
         self._command = 'remove'
 
     def parse_params(self, cli_input: str) -> ParseResult:
-        result = PointParser().parse_point(cli_input)
+        result = PointParser.parse_point(cli_input)
         if result.is_successful():
             abs_point = self.convert_points([result.get_match()])
 
@@ -206,6 +210,32 @@ class ListParser(CommandParser):
         pass
 
 
+class StatsParser(CommandParser):
+    """
+    Parser for "stats" (Stats) Command.
+    Definition: stats <TOPIC>
+    TOPIC ::= render | parser
+    """
+    def __init__(self, controller):
+        super().__init__(controller)
+        self._command = 'stats'
+        self.topics = STATS_TOPICS
+        self._topic_parser = WordParser()
+
+    def parse_params(self, cli_input: str) -> ParseResult:
+        result = self._topic_parser.parse_input(cli_input)
+        if result.is_successful() and result.get_match() in self.topics:
+            return Success(StatsCommand(self._controller, result.get_match()), result.get_remainder())
+
+        return Failure(' | '.join(self.topics), cli_input)
+
+    def has_parameters(self) -> bool:
+        return True
+
+    def get_command(self):
+        pass
+
+
 class ClearParser(CommandParser):
     """
     Parser for 'clear' (Clear) command.
@@ -343,7 +373,7 @@ class RectParser(ShapeCommandParser):
         """
         Parse a Point and two Natural numbers from given input.
         """
-        point_result = PointParser().parse_point(cli_input)
+        point_result = PointParser.parse_point(cli_input)
         if point_result.is_successful():
             width_result = self.width_parser.parse_input(point_result.get_remainder())
             if width_result.is_successful():
@@ -412,7 +442,7 @@ class CircleParser(ShapeCommandParser):
         """
         Parse a Point and a Natural number from given input.
         """
-        point_result = PointParser().parse_point(cli_input)
+        point_result = PointParser.parse_point(cli_input)
         if point_result.is_successful():
             radius_result = self.radius_parser.parse_input(point_result.get_remainder())
             if radius_result.is_successful():
@@ -438,7 +468,7 @@ class DotParser(ShapeCommandParser):
         self._command = 'dot'
 
     def parse_params(self, cli_input: str) -> ParseResult:
-        point_result = PointParser().parse_point(cli_input)
+        point_result = PointParser.parse_point(cli_input)
         if point_result.is_successful():
             abs_point = self.convert_points([point_result.get_match()])
             point_x = abs_point[0].x
@@ -495,7 +525,7 @@ class LineParser(ShapeCommandParser):
             else:
                 # try to parse a point or a color
                 while True:
-                    point_result = PointParser().parse_point(remainder)
+                    point_result = PointParser.parse_point(remainder)
                     if point_result.is_successful():
                         points.append(point_result.get_match())
                         remainder = point_result.get_remainder()
@@ -11,14 +11,14 @@ class LowLevelParser:
         """
         self._expected = expected
         self._delimiter = delimiter
-
-    def parse_input(self, cli_input: str) -> ParseResult:
-        if self._delimiter == '':
-            match = re.match(r'^(\s*)(' + self._expected + ')(\s+|$)', cli_input)
+        # The pattern is compiled only once, parsers are reused for all the inputs
+        if delimiter == '':
+            self._pattern = re.compile(r'^(\s*)(' + expected + r')(\s+|$)')
         else:
-            match = re.match(r'^(\s*)(' + self._expected + ')' +
-                             r'(\s*)' + re.escape(self._delimiter) + r'(\s*|$)', cli_input)
+            self._pattern = re.compile(r'^(\s*)(' + expected + r')(\s*)' + re.escape(delimiter) + r'(\s*|$)')
 
+    def parse_input(self, cli_input: str) -> ParseResult:
+        match = self._pattern.match(cli_input)
         if match:
             remainder = cli_input[match.end():]
             return Success(match.group(2), remainder)
@@ -28,7 +28,7 @@ class LowLevelParser:
 
 class WordParser(LowLevelParser):
     def __init__(self):
-        super().__init__('\w+')
+        super().__init__(r'\w+')
 
 
 class StringParser(LowLevelParser):
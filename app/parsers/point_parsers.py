@@ -5,6 +5,12 @@ from app.parsers.parse_results import ParseResult, Success, Failure
 
 
 class PointParser:
+    # Parsers don't hold any state, so they are shared by all the calls
+    _first_nat_parser = NatParser(',')
+    _second_nat_parser = NatParser()
+    _first_int_parser = IntParser(',')
+    _second_int_parser = IntParser()
+
     @staticmethod
     def parse_point(cli_input: str):
         """
@@ -14,19 +20,18 @@ class PointParser:
         :return Success(AbsoluteParserPoint or RelativeParserPoint, remainder) if input contains either valid
         absolute point or relative point, Failure(expected format, the given cli_input) otherwise
         """
-        first_nat_parser = NatParser(',')
-        second_nat_parser = NatParser()
-        first_int_parser = IntParser(',')
-        second_int_parser = IntParser()
-
         # Parse absolute point from given input
-        abs_point_parse = PointParser().parse_input(first_nat_parser, second_nat_parser, cli_input)
+        abs_point_parse = PointParser.parse_input(
+            PointParser._first_nat_parser, PointParser._second_nat_parser, cli_input
+        )
         if abs_point_parse.is_successful():
             abs_point = AbsoluteParserPoint(abs_point_parse.get_match()[0], abs_point_parse.get_match()[1])
             return Success(abs_point, abs_point_parse.get_remainder())
 
         # Parse relative point from given input
-        rel_point_parse = PointParser().parse_input(first_int_parser, second_int_parser, cli_input)
+        rel_point_parse = PointParser.parse_input(
+            PointParser._first_int_parser, PointParser._second_int_parser, cli_input
+        )
         if rel_point_parse.is_successful():
             rel_point = RelativeParserPoint(rel_point_parse.get_match()[0], rel_point_parse.get_match()[1])
             return Success(rel_point, rel_point_parse.get_remainder())
@@ -0,0 +1,282 @@
+import re
+from collections import OrderedDict
+from typing import Optional, List, Tuple, Callable
+
+from app.parsers.command_parsers import STATS_TOPICS
+from app.parsers.color_parser import ColorParser
+from app.shape_factory import DimensionsRectFactory, DimensionsCircleFactory
+from app.commands import PrintDotCommand, PrintRectCommand, PrintCircleCommand, PrintLineCommand, \
+    PrintPolylineCommand, MoveShapeCommand, RemoveShapeCommand, ListShapeCommand, LoadCommand, SaveCommand, \
+    ClearCommand, QuitCommand, StatsCommand, Command, InvalidCommand
+from app.utils import Color
+from app.controller import Controller
+
+
+# Every token is followed by all the whitespace behind it. Alternatives are tried in the order,
+# so e.g. "10,20" is always a point and "10" a number, never a word
+TOKEN_PATTERN = re.compile(
+    r'(?:(?P<x>[+-]?\d+)\s*,\s*(?P<y>[+-]?\d+)|(?P<nat>\d+)|(?P<word>\w+)|\S+)(?P<space>\s*)'
+)
+LEADING_SPACE_PATTERN = re.compile(r'\s*')
+# Number of lines whose commands are remembered by the parser of the app
+PARSE_CACHE_SIZE = 1024
+
+# Kinds of the parameter slots of the commands
+POINT = 'point'
+POINTS = 'points'
+WIDTH = 'width'
+NAT = 'nat'
+TOPIC = 'topic'
+COLOR = 'color'
+REST = 'rest'
+
+
+class Token:
+    __slots__ = ('start', 'end', 'x', 'y', 'nat', 'word', 'space', 'closed')
+
+    def __init__(self, match, line_length: int):
+        self.start = match.start()
+        self.end = match.end()
+        self.x, self.y, self.nat, self.word, self.space = match.groups()
+        # Token has to be separated from the next one by a whitespace (or be the last one)
+        self.closed = self.space != '' or self.end == line_length
+
+    def point(self) -> Optional[Tuple[int, int, bool]]:
+        """
+        :return: (x, y, is absolute) if the token is a valid point, None otherwise
+        """
+        if self.x is None or not self.closed:
+            return None
+        x_signed = self.x[0] in '+-'
+        if x_signed != (self.y[0] in '+-'):
+            # Absolute point has both coordinates unsigned, relative one both signed
+            return None
+        return int(self.x), int(self.y), not x_signed
+
+
+class Lexer:
+    """
+    Splits the input into tokens on demand, every token is matched only once. Position in the tokens
+    can be saved and restored, so the parser can try another alternative without lexing the input again.
+    """
+
+    def __init__(self, line: str):
+        self.line = line
+        self._tokens = []
+        self._end = LEADING_SPACE_PATTERN.match(line).end()
+        self._index = 0
+        # Set when the rest of the line has been consumed at once
+        self._finished = False
+
+    def save(self) -> Tuple[int, bool]:
+        return self._index, self._finished
+
+    def restore(self, state: Tuple[int, bool]):
+        self._index, self._finished = state
+
+    def next(self) -> Optional[Token]:
+        if self._finished:
+            return None
+        if self._index == len(self._tokens):
+            if self._end == len(self.line):
+                return None
+            token = Token(TOKEN_PATTERN.match(self.line, self._end), len(self.line))
+            self._tokens.append(token)
+            self._end = token.end
+        token = self._tokens[self._index]
+        self._index += 1
+        return token
+
+    def position(self) -> int:
+        """
+        :return: position in the line where the next token starts
+        """
+        if self._finished:
+            return len(self.line)
+        return self._tokens[self._index].start if self._index < len(self._tokens) else self._end
+
+    def rest(self) -> str:
+        """
+        Consume the rest of the line.
+        """
+        rest = self.line[self.position():]
+        self._finished = True
+        return rest
+
+    def at_end(self) -> bool:
+        return self.position() == len(self.line)
+
+
+def convert_points(points: List[Tuple[int, int, bool]]) -> List[Tuple[int, int]]:
+    """
+    Same as `CommandParser.convert_points`, every relative point is relative to its predecessor
+    (the first one to [0,0]).
+    """
+    absolute_points = []
+    predecessor_x, predecessor_y = 0, 0
+    for x, y, is_absolute in points:
+        if not is_absolute:
+            x, y = x + predecessor_x, y + predecessor_y
+        absolute_points.append((x, y))
+        predecessor_x, predecessor_y = x, y
+    return absolute_points
+
+
+def build_line(controller: Controller, points: List[Tuple[int, int]], color) -> Command:
+    if len(points) == 2:
+        return PrintLineCommand(controller, *points[0], *points[1], color)
+    return PrintPolylineCommand(controller, points, color)
+
+
+# Command word -> alternatives of its parameters, each alternative is a sequence of slots and a function
+# creating the command from the controller, converted points and values of the other slots
+COMMAND_TABLE = {
+    'remove': [((POINT,), lambda c, p: RemoveShapeCommand(c, *p[0]))],
+    'move': [((POINT, POINT), lambda c, p: MoveShapeCommand(c, *p[0], *p[1]))],
+    'save': [((REST,), lambda c, p, file: SaveCommand(c, file))],
+    'load': [((REST,), lambda c, p, file: LoadCommand(c, file))],
+    'quit': [((), lambda c, p: QuitCommand(c))],
+    'ls': [
+        ((), lambda c, p: ListShapeCommand(c)),
+        ((POINT,), lambda c, p: ListShapeCommand(c, *p[0])),
+    ],
+    'stats': [((TOPIC,), lambda c, p, topic: StatsCommand(c, topic))],
+    'clear': [((), lambda c, p: ClearCommand(c))],
+    'rect': [
+        ((POINT, POINT, COLOR), lambda c, p, color: PrintRectCommand(
+            c, *p[0], color, end_x=p[1][0], end_y=p[1][1]
+        )),
+        ((POINT, WIDTH, NAT, COLOR), lambda c, p, width, height, color: PrintRectCommand(
+            c, *p[0], color, DimensionsRectFactory, width=width, height=height
+        )),
+    ],
+    'circle': [
+        ((POINT, POINT, COLOR), lambda c, p, color: PrintCircleCommand(
+            c, *p[0], color, end_x=p[1][0], end_y=p[1][1]
+        )),
+        ((POINT, NAT, COLOR), lambda c, p, radius, color: PrintCircleCommand(
+            c, *p[0], color, DimensionsCircleFactory, radius=radius
+        )),
+    ],
+    'dot': [((POINT, COLOR), lambda c, p, color: PrintDotCommand(c, *p[0], color))],
+    'line': [((POINT, POINT, POINTS, COLOR), lambda c, p, color: build_line(c, p, color))],
+}
+
+
+class TableCliParser:
+    """
+    Command line input Parser driven by a table of the commands' parameters. Accepts exactly the same
+    language and creates the same commands as `CliParser`, but the input is split into tokens by a single
+    regular expression (instead of matching every parameter by a chain of parsers), which is much faster.
+    """
+
+    def __init__(self, controller: Controller, color_parser: ColorParser,
+                 command_table: dict = None, topics: List[str] = None, cache_size: int = 0):
+        """
+        :param cache_size: maximal number of lines whose parsed commands are remembered (0 turns the cache off)
+        """
+        self.controller = controller
+        self.color_parser = color_parser
+        self.command_table = command_table if command_table is not None else COMMAND_TABLE
+        self.topics = topics if topics is not None else STATS_TOPICS
+        self.cache_size = cache_size
+        # Line -> template of its command (or None if the line is invalid), least recently used first
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def parse_input(self, cli_input: str) -> Command:
+        """
+        Parse given command line input.
+        :param cli_input: the input from CLI
+        :return: corresponding Command if parsing is successful,
+        InvalidCommand otherwise
+        """
+        if self.cache_size > 0:
+            if cli_input in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(cli_input)
+                template = self._cache[cli_input]
+            else:
+                self.misses += 1
+                template = self._parse_template(cli_input)
+                self._cache[cli_input] = template
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        else:
+            template = self._parse_template(cli_input)
+
+        if template is None:
+            return InvalidCommand(self.controller)
+        # Commands hold the state of their execution, so a new one is created every time
+        create_command, points, values = template
+        return create_command(self.controller, points, *values)
+
+    def _parse_template(self, cli_input: str) -> Optional[Tuple[Callable, list, list]]:
+        """
+        :return: function creating the command and its parameters, None if the input is invalid
+        """
+        lexer = Lexer(cli_input)
+        command_token = lexer.next()
+        if command_token is not None and command_token.word is not None and command_token.closed:
+            for slots, create_command in self.command_table.get(command_token.word, ()):
+                state = lexer.save()
+                points = []
+                values = self._parse_slots(lexer, slots, points)
+                if values is not None and lexer.at_end():
+                    return create_command, convert_points(points), values
+                lexer.restore(state)
+
+        return None
+
+    def _parse_slots(self, lexer: Lexer, slots: Tuple[str, ...], points: list) -> Optional[list]:
+        """
+        Parse the parameters in given slots. Points are appended to the given list.
+        :return: values of the other slots, None if the input doesn't match
+        """
+        values = []
+        for slot in slots:
+            if slot == POINT:
+                token = lexer.next()
+                point = token.point() if token is not None else None
+                if point is None:
+                    return None
+                points.append(point)
+            elif slot == POINTS:
+                while True:
+                    state = lexer.save()
+                    token = lexer.next()
+                    point = token.point() if token is not None else None
+                    if point is None:
+                        lexer.restore(state)
+                        break
+                    points.append(point)
+            elif slot == WIDTH or slot == NAT:
+                token = lexer.next()
+                if token is None or token.nat is None or not token.closed:
+                    return None
+                if slot == WIDTH and ' ' not in token.space:
+                    # Width is delimited by a space
+                    return None
+                values.append(int(token.nat))
+            elif slot == TOPIC:
+                token = lexer.next()
+                if token is None or token.word not in self.topics or not token.closed:
+                    return None
+                values.append(token.word)
+            elif slot == COLOR:
+                rest = lexer.rest()
+                if rest == '':
+                    values.append(Color(0, 0, 0))
+                else:
+                    color_result = self.color_parser.parse_color(rest)
+                    if not color_result.is_successful():
+                        return None
+                    values.append(color_result.get_match())
+            elif slot == REST:
+                rest = lexer.rest()
+                values.append(rest if rest != '' else None)
+        return values
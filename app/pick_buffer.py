@@ -0,0 +1,132 @@
+from typing import List, Optional
+
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QImage, QPainter, QRegion, QColor
+
+from app.printers import PickPrinter, segment_tolerance, PICK_MARGIN
+from app.shapes import Shape, DISTANCE_CONST_DOT
+from app.shapes_store import ShapesStore
+from app.utils import Point
+
+
+# Maximal number of pixels of the pick buffer, bigger scenes are hit-tested only by the geometry
+MAX_PICK_PIXELS = 4096 * 4096
+# Extra space (in pixels) around the shapes when the buffer is (re)allocated, so it doesn't need
+# to grow whenever a shape is added next to the others
+PICK_BUFFER_SLACK = 256
+# Pick ids are stored in 24 bits of RGB, 0 means that there's no shape
+MAX_PICK_ID = 0xFFFFFF
+
+
+class PickBuffer:
+    """
+    Offscreen image of the scene in which every shape is drawn with a color encoding its pick id
+    (see `PickPrinter`), so finding the topmost shape at some point is just a single pixel read.
+    The buffer is synchronized lazily with the store - only regions of added and removed shapes
+    are redrawn.
+    """
+
+    def __init__(self, max_pixels: int = MAX_PICK_PIXELS):
+        self._max_pixels = max_pixels
+        self._image = None
+        # Scene coordinates of the top-left pixel
+        self._origin = None
+        self._generation = None
+        # Pick ids by `id()` of the shapes, the shapes themselves are kept by their pick ids
+        # (which also keeps them alive, so their `id()` can't be reused)
+        self._pick_ids = {}
+        self._shapes_by_pick_id = {}
+        self._next_pick_id = 1
+        self.full_redraws = 0
+        self.partial_redraws = 0
+
+    @property
+    def enabled(self) -> bool:
+        # Too big scenes don't fit into the buffer
+        return self._image is not None
+
+    @staticmethod
+    def _pick_rect(shape: Shape) -> QRect:
+        # Whole area where the shape can be grabbed (any segment of the shape is at most as long as the diagonal)
+        box = shape.bounding_box()
+        diagonal = ((box.right - box.left) ** 2 + (box.bottom - box.top) ** 2) ** 0.5
+        margin = int(max(segment_tolerance(diagonal), DISTANCE_CONST_DOT) + PICK_MARGIN) + 1
+        return QRect(box.left, box.top, box.right - box.left + 1, box.bottom - box.top + 1).adjusted(
+            -margin, -margin, margin, margin
+        )
+
+    def sync(self, store: ShapesStore):
+        if store.generation == self._generation:
+            return
+
+        self._generation = store.generation
+        shapes = store.shapes_at()
+        current = {id(shape) for shape in shapes}
+        removed = [
+            self._shapes_by_pick_id.pop(pick_id) for key, pick_id in list(self._pick_ids.items())
+            if key not in current
+        ]
+        for shape in removed:
+            del self._pick_ids[id(shape)]
+        added = [shape for shape in shapes if id(shape) not in self._pick_ids]
+
+        if self._next_pick_id + len(added) > MAX_PICK_ID:
+            # Running out of ids, all the shapes get new ones
+            self._pick_ids.clear()
+            self._shapes_by_pick_id.clear()
+            self._next_pick_id = 1
+            added = shapes
+        for shape in added:
+            self._pick_ids[id(shape)] = self._next_pick_id
+            self._shapes_by_pick_id[self._next_pick_id] = shape
+            self._next_pick_id += 1
+
+        dirty = [self._pick_rect(shape) for shape in removed + added]
+        buffer_rect = QRect(self._origin, self._image.size()) if self._image is not None else QRect()
+        if (
+            self._image is None or len(dirty) > len(shapes) // 2
+            or any(not buffer_rect.contains(rect) for rect in dirty)
+        ):
+            self._redraw_all(shapes)
+        elif dirty:
+            self.partial_redraws += 1
+            region = QRegion()
+            for rect in dirty:
+                region = region.united(rect)
+            self._redraw(shapes, region)
+
+    def _redraw_all(self, shapes: List[Shape]):
+        self.full_redraws += 1
+        rect = QRect()
+        for shape in shapes:
+            rect = rect.united(self._pick_rect(shape))
+        rect.adjust(-PICK_BUFFER_SLACK, -PICK_BUFFER_SLACK, PICK_BUFFER_SLACK, PICK_BUFFER_SLACK)
+        if rect.width() * rect.height() > self._max_pixels:
+            self._image = None
+            return
+
+        self._image = QImage(rect.size(), QImage.Format_RGB32)
+        self._origin = rect.topLeft()
+        self._redraw(shapes, QRegion(rect))
+
+    def _redraw(self, shapes: List[Shape], region: QRegion):
+        painter = QPainter(self._image)
+        device_region = region.translated(-self._origin)
+        painter.setClipRegion(device_region)
+        painter.fillRect(device_region.boundingRect(), QColor(0, 0, 0))
+        # Integer scene point is sampled by the center of the pixel
+        painter.translate(0.5 - self._origin.x(), 0.5 - self._origin.y())
+        printer = PickPrinter(painter, self._pick_ids)
+        for shape in shapes:
+            if region.intersects(self._pick_rect(shape)):
+                shape.print_to(printer)
+        painter.end()
+
+    def pick(self, point: Point) -> Optional[Shape]:
+        """
+        :return: the topmost shape which may contain given point (with divergence), None if there's surely none
+        """
+        x, y = int(point.x) - self._origin.x(), int(point.y) - self._origin.y()
+        if not (0 <= x < self._image.width() and 0 <= y < self._image.height()):
+            return None
+        return self._shapes_by_pick_id.get(self._image.pixel(x, y) & 0xFFFFFF)
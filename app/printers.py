@@ -1,20 +1,52 @@
-from typing import TextIO
+import math
+from collections import OrderedDict
+from typing import TextIO, List, Callable, Tuple, Dict
 
-from PyQt5.QtCore import QPointF
-from PyQt5.QtGui import QColor, QPainter, QPen
+from PyQt5.QtCore import QPointF, QLine, QLineF, QRect, QRectF, Qt
+from PyQt5.QtGui import QColor, QPainter, QPen, QPolygonF, QImage, QTransform
 
 from app.canvas import Canvas
-from app.shapes import Dot, Line, Polyline, Rectangle, Circle, Shape
-from app.utils import Color
+from app.shapes import Dot, Line, Polyline, Rectangle, Circle, Shape, DISTANCE_CONST, DISTANCE_CONST_DOT
+from app.utils import Color, BoundingBox, simplify_polyline
+
+
+# Maximal (estimated) memory in bytes taken by the cached display lists of one printer
+DISPLAY_LIST_CACHE_BYTES = 32 * 1024 * 1024
+# Estimated memory taken by a cached display list besides its points
+DISPLAY_LIST_OVERHEAD = 64
+# Polylines with more points are simplified before drawing, so that QPainter doesn't get more points than
+# can be seen. Points closer than the tolerance (in device pixels) to the simplified polyline are dropped.
+LOD_MIN_POINTS = 16
+LOD_TOLERANCE = 0.5
+# Shapes in the pick buffer are drawn this much (in pixels) bigger than the area in which they can be grabbed,
+# so the aliased rasterization never misses any point of that area
+PICK_MARGIN = 1
+
+
+def segment_tolerance(length: float) -> float:
+    """
+    Maximal distance from a segment of given length at which `contains` with divergence still succeeds.
+    Such points form an ellipse with the end points of the segment as its foci.
+    """
+    return math.sqrt(2 * length * DISTANCE_CONST + DISTANCE_CONST ** 2) / 2
 
 
 class Printer:
     """
     Represents a visitor in the visitor design patter. Is responsible for HOW to print different shapes.
     """
+    def __init__(self):
+        # How many times the printer had to set up its drawing state (e.g. pen or brush)
+        self.state_changes = 0
+
     def update(self, controller):
         controller.print_all_shapes(self)
 
+    def flush(self):
+        # Called after all the shapes have been printed, printers which are postponing
+        # the printing have to finish it here
+        pass
+
     def print_dot(self, dot: Dot):
         raise NotImplementedError
 
@@ -74,18 +106,96 @@ class FileTextPrinter(AbstractTextPrinter):
             f.write(str(shape) + '\n')
 
 
+class DisplayListCache:
+    """
+    LRU cache of Qt primitives built from the shapes, so they don't have to be built again on every repaint.
+    Shapes are never changed in place (moving creates a new shape), so a cached primitive is valid
+    until the shape is replaced - then the old entry just isn't used anymore and drops out eventually.
+    """
+    def __init__(self, max_bytes: int = DISPLAY_LIST_CACHE_BYTES):
+        self._max_bytes = max_bytes
+        # (id(shape), level) -> (shape, primitive, size), keeping the shape alive so its id can't be reused by another one
+        self._entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, shape: Shape, build: Callable[[Shape], Tuple[object, int]], level: float = None):
+        """
+        :param build: returns the primitive for given shape and its estimated size in bytes
+        :param level: level of detail (e.g. zoom) the primitive was built for
+        """
+        key = (id(shape), level)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        primitive, size = build(shape)
+        self._entries[key] = (shape, primitive, size)
+        self.size += size
+        while self.size > self._max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+        return primitive
+
+
 class CanvasPrinter(Printer):
-    def __init__(self, canvas: Canvas):
+    def __init__(self, canvas: Canvas, display_list_bytes: int = DISPLAY_LIST_CACHE_BYTES):
         super().__init__()
         self._canvas = canvas
+        self.display_lists = DisplayListCache(display_list_bytes)
+
+    def _view_transform(self) -> QTransform:
+        # Live canvas may be zoomed and panned, other paint devices (e.g. images) are printed 1:1
+        return self._canvas.scene_transform() if isinstance(self._canvas, Canvas) else QTransform()
+
+    def _scale(self) -> float:
+        # Device pixels per one unit of the scene
+        transform = self._view_transform()
+        return max(abs(transform.m11()), abs(transform.m22()))
+
+    def _build_polygon(self, polyline: Polyline) -> Tuple[QPolygonF, int]:
+        points = polyline.get_props()
+        if len(points) > LOD_MIN_POINTS:
+            # Only the drawing is simplified, the shape itself (e.g. for hit-testing) stays untouched
+            points = simplify_polyline(points, LOD_TOLERANCE / self._scale())
+        polygon = QPolygonF([QPointF(point.x, point.y) for point in points])
+        return polygon, DISPLAY_LIST_OVERHEAD + 16 * len(points)
+
+    @staticmethod
+    def _build_ellipse_rect(circle: Circle) -> Tuple[QRect, int]:
+        # There's no direct method for drawing circles in PyQt, so we have
+        # to draw ellipse outside a rectangle starting at [start_x, start_y],
+        # with height and width set to radius of circle
+        start_x = circle.start.x - circle.radius
+        start_y = circle.start.y - circle.radius
+        return QRect(start_x, start_y, circle.radius * 2, circle.radius * 2), DISPLAY_LIST_OVERHEAD
+
+    def _polygon(self, polyline: Polyline) -> QPolygonF:
+        return self.display_lists.get(polyline, self._build_polygon, self._scale())
+
+    def _ellipse_rect(self, circle: Circle) -> QRect:
+        return self.display_lists.get(circle, self._build_ellipse_rect)
 
     def update(self, controller):
         # Emitting the QEvent.Paint event to enable drawing
-        self._canvas.update()
+        self._canvas.request_paint()
 
-    def _prepare_painter(self, color: Color):
+    def _begin_painter(self) -> QPainter:
         painter = QPainter(self._canvas)
+        painter.setTransform(self._view_transform())
+        return painter
+
+    def _prepare_painter(self, color: Color):
+        painter = self._begin_painter()
         painter.setBrush(QColor(*color))
+        self.state_changes += 1
         return painter
 
     def print_dot(self, dot: Dot):
@@ -101,10 +211,7 @@ class CanvasPrinter(Printer):
 
     def print_polyline(self, polyline: Polyline):
         painter = self._prepare_painter(polyline.color)
-        q_points = []
-        for point in polyline.get_props():
-            q_points.append(QPointF(point.x, point.y))
-        painter.drawPolyline(*q_points)
+        painter.drawPolyline(self._polygon(polyline))
 
     def print_rectangle(self, rect: Rectangle):
         painter = self._prepare_painter(rect.color)
@@ -112,9 +219,178 @@ class CanvasPrinter(Printer):
 
     def print_circle(self, circle: Circle):
         painter = self._prepare_painter(circle.color)
-        # There's no direct method for drawing circles in PyQt, so we have
-        # to draw ellipse outside a rectangle starting at [start_x, start_y],
-        # with height and width set to radius of circle
-        start_x = circle.start.x - circle.radius
-        start_y = circle.start.y - circle.radius
-        painter.drawEllipse(start_x, start_y, circle.radius * 2, circle.radius * 2)
+        painter.drawEllipse(self._ellipse_rect(circle))
+
+
+class BatchCanvasPrinter(CanvasPrinter):
+    """
+    Canvas printer which doesn't draw every shape right away. Consecutive shapes of the same type and color
+    (a run) are collected and drawn together, so the painter is set up only once per run and dots and lines
+    are submitted to QPainter in a single call. Because only consecutive shapes are grouped
+    together, stacking order of the shapes stays the same. Pending run is drawn in `flush`.
+    """
+    def __init__(self, canvas: Canvas, display_list_bytes: int = DISPLAY_LIST_CACHE_BYTES):
+        super().__init__(canvas, display_list_bytes)
+        self._painter = None
+        self._run_key = None
+        self._run = []
+
+    def _batch(self, draw_run, shape: Shape):
+        run_key = (draw_run, tuple(shape.color))
+        if run_key != self._run_key:
+            self._draw_run()
+            self._run_key = run_key
+        self._run.append(shape)
+
+    def _draw_run(self):
+        if not self._run:
+            return
+
+        if self._painter is None:
+            self._painter = self._begin_painter()
+        draw_run, color = self._run_key
+        self._painter.setBrush(QColor(*color))
+        self._painter.setPen(QPen())
+        self.state_changes += 1
+        draw_run(self._painter, self._run)
+        self._run = []
+
+    def flush(self):
+        self._draw_run()
+        if self._painter is not None:
+            self._painter.end()
+            self._painter = None
+        self._run_key = None
+
+    @staticmethod
+    def _draw_dots(painter: QPainter, dots: List[Dot]):
+        pen = QPen(painter.brush(), 5)
+        pen.setColor(painter.brush().color())
+        painter.setPen(pen)
+        painter.drawPoints(QPolygonF([QPointF(*dot.get_props()) for dot in dots]))
+
+    @staticmethod
+    def _draw_lines(painter: QPainter, lines: List[Line]):
+        painter.drawLines([QLine(*line.get_props()) for line in lines])
+
+    def _draw_polylines(self, painter: QPainter, polylines: List[Polyline]):
+        for polyline in polylines:
+            painter.drawPolyline(self._polygon(polyline))
+
+    @staticmethod
+    def _draw_rectangles(painter: QPainter, rects: List[Rectangle]):
+        # `drawRects` fills all the rectangles first and outlines them afterwards, which would change
+        # the stacking of overlapping rectangles, so they are drawn one by one with the shared painter
+        for rect in rects:
+            painter.drawRect(*rect.get_props())
+
+    def _draw_circles(self, painter: QPainter, circles: List[Circle]):
+        # There's no batch method for ellipses in PyQt, at least the painter is shared within the run
+        for circle in circles:
+            painter.drawEllipse(self._ellipse_rect(circle))
+
+    def print_dot(self, dot: Dot):
+        self._batch(self._draw_dots, dot)
+
+    def print_line(self, line: Line):
+        self._batch(self._draw_lines, line)
+
+    def print_polyline(self, polyline: Polyline):
+        self._batch(self._draw_polylines, polyline)
+
+    def print_rectangle(self, rect: Rectangle):
+        self._batch(self._draw_rectangles, rect)
+
+    def print_circle(self, circle: Circle):
+        self._batch(self._draw_circles, circle)
+
+
+def region_transform(region: QRectF, image_rect: QRect) -> QTransform:
+    """
+    Transformation scaling given region of the scene to fit `image_rect`.
+    """
+    # Moving by whole pixels first, so the parts of the same picture are rasterized the same way
+    transform = QTransform.fromTranslate(image_rect.left(), image_rect.top())
+    transform.scale(image_rect.width() / region.width(), image_rect.height() / region.height())
+    transform.translate(-region.left(), -region.top())
+    return transform
+
+
+class ImagePrinter(BatchCanvasPrinter):
+    """
+    Prints the scene into a QImage, so it doesn't need any live widget (works even under the `offscreen`
+    Qt platform). The scene is mapped into the image by given transformation (see `region_transform`),
+    the image may show just a part (e.g. a strip or a tile) of a bigger picture.
+    """
+    def __init__(self, image: QImage, transform: QTransform, background: Color = Color(255, 255, 255)):
+        super().__init__(image)
+        self._background = background
+        self._transform = transform
+
+    def _view_transform(self) -> QTransform:
+        return self._transform
+
+    def update(self, controller):
+        self._canvas.fill(QColor(*self._background))
+        controller.print_all_shapes(self, viewport=self.viewport())
+
+    def viewport(self) -> BoundingBox:
+        # Part of the scene which is visible in the image (plus margin for wide strokes),
+        # so we don't print shapes outside of it
+        visible = self._transform.inverted()[0].mapRect(QRectF(self._canvas.rect()).adjusted(-5, -5, 5, 5))
+        return BoundingBox(visible.left(), visible.top(), visible.right(), visible.bottom())
+
+
+class PickPrinter(Printer):
+    """
+    Prints every shape filled with a unique color, which encodes the shape's pick id (see `PickBuffer`).
+    Shapes are drawn a bit bigger than the area in which they can be grabbed (i.e. where `contains`
+    with divergence succeeds), so a point where nothing is printed surely doesn't hit any shape.
+    """
+    def __init__(self, painter: QPainter, pick_ids: Dict[int, int]):
+        super().__init__()
+        self._painter = painter
+        # Pick ids by `id()` of the shapes
+        self._pick_ids = pick_ids
+
+    def _color(self, shape: Shape) -> QColor:
+        pick_id = self._pick_ids[id(shape)]
+        return QColor((pick_id >> 16) & 0xFF, (pick_id >> 8) & 0xFF, pick_id & 0xFF)
+
+    def _fill(self, shape: Shape):
+        self._painter.setPen(Qt.NoPen)
+        self._painter.setBrush(self._color(shape))
+
+    def _stroke(self, shape: Shape, length: float):
+        width = 2 * (segment_tolerance(length) + PICK_MARGIN)
+        self._painter.setPen(QPen(self._color(shape), width, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+        self._painter.setBrush(Qt.NoBrush)
+
+    def print_dot(self, dot: Dot):
+        self._fill(dot)
+        radius = DISTANCE_CONST_DOT + PICK_MARGIN
+        self._painter.drawEllipse(QPointF(*dot.get_props()), radius, radius)
+
+    def print_line(self, line: Line):
+        segment = QLineF(*line.get_props())
+        self._stroke(line, segment.length())
+        self._painter.drawLine(segment)
+
+    def print_polyline(self, polyline: Polyline):
+        points = polyline.get_props()
+        for start, end in zip(points, points[1:]):
+            segment = QLineF(start.x, start.y, end.x, end.y)
+            self._stroke(polyline, segment.length())
+            self._painter.drawLine(segment)
+
+    def print_rectangle(self, rect: Rectangle):
+        self._fill(rect)
+        x, y, width, height = rect.get_props()
+        self._painter.drawRect(
+            QRectF(x - PICK_MARGIN, y - PICK_MARGIN, width + 2 * PICK_MARGIN, height + 2 * PICK_MARGIN)
+        )
+
+    def print_circle(self, circle: Circle):
+        self._fill(circle)
+        x, y, radius = circle.get_props()
+        self._painter.drawEllipse(QPointF(x, y), radius + PICK_MARGIN, radius + PICK_MARGIN)
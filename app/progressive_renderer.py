@@ -0,0 +1,78 @@
+import time
+
+from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtGui import QImage, QPainter
+
+from app.canvas import Canvas
+from app.printers import ImagePrinter
+
+
+# Time (in seconds) spent by drawing shapes during one paint event
+FRAME_BUDGET = 0.008
+
+
+class ProgressiveRenderer:
+    """
+    Draws the shapes into a backing image in chunks, each chunk limited by the time budget, so a huge scene
+    doesn't block the UI. Whatever is drawn so far is shown immediately, the rest is drawn during the next
+    event loop iterations. Any change of the scene (or of the canvas size or view) starts the drawing from scratch.
+    """
+
+    def __init__(self, canvas: Canvas, controller, budget: float = FRAME_BUDGET):
+        self._canvas = canvas
+        self._controller = controller
+        self._budget = budget
+        self._image = None
+        self._printer = None
+        self._viewport = None
+        self._scene_key = None
+        self._next_shape = 0
+        self.finished = False
+
+        # Zero timeout - resume as soon as the events (e.g. input) that came in meanwhile are processed
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._canvas.update)
+
+    def _restart(self):
+        self._image = QImage(self._canvas.size(), QImage.Format_ARGB32_Premultiplied)
+        self._image.fill(Qt.transparent)
+        self._printer = ImagePrinter(self._image, self._canvas.scene_transform())
+        # The whole canvas is drawn (not only the visible part), so scrolling doesn't need a restart
+        self._viewport = self._canvas.scene_rect(self._image.rect())
+        self._next_shape = 0
+        self.finished = False
+
+    def paint(self) -> int:
+        """
+        Draw next chunk of the shapes and show the backing image with the preview on top of it.
+        :return: number of shapes drawn
+        """
+        scene_key = (
+            self._controller.scene_generation(), self._canvas.size(), self._canvas.zoom_level, self._canvas.offset
+        )
+        if scene_key != self._scene_key:
+            self._scene_key = scene_key
+            self._restart()
+
+        drawn = 0
+        if not self.finished:
+            start = self._next_shape
+            self._next_shape = self._controller.print_shapes_chunk(
+                self._printer, start, self._viewport, time.perf_counter() + self._budget
+            )
+            drawn = self._next_shape - start - self._controller.culled_shapes()
+            self.finished = self._next_shape == len(self._controller.shapes_at())
+            if not self.finished:
+                self._timer.start()
+
+        painter = QPainter(self._canvas)
+        painter.drawImage(0, 0, self._image)
+        painter.end()
+        self._controller.print_preview()
+
+        return drawn
+
+    def stop(self):
+        self._timer.stop()
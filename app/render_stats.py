@@ -0,0 +1,83 @@
+import logging
+import time
+from collections import deque
+from typing import List, Dict
+
+
+logger = logging.getLogger(__name__)
+
+# How many of the latest frames are kept
+FRAME_SAMPLES = 600
+# Frames taking longer than this (in ms) are logged
+SLOW_FRAME_THRESHOLD = 50
+# Upper bounds (in ms) of the frame time histogram buckets, the last bucket has no upper bound
+HISTOGRAM_BUCKETS = [1, 2, 4, 8, 16, 33, 66]
+
+
+class FrameStats:
+    def __init__(self, end: float, frame_time: float, drawn: int, culled: int, state_changes: int):
+        self.end = end
+        self.frame_time = frame_time
+        self.drawn = drawn
+        self.culled = culled
+        self.state_changes = state_changes
+
+
+class RenderStats:
+    """
+    Rolling statistics of the painted frames, so we can see how expensive the rendering is.
+    """
+
+    def __init__(self, slow_frame_threshold: float = SLOW_FRAME_THRESHOLD, samples: int = FRAME_SAMPLES):
+        self.slow_frame_threshold = slow_frame_threshold
+        self._frames = deque(maxlen=samples)
+        self.slow_frames = 0
+
+    def record_frame(self, frame_time: float, drawn: int, culled: int, state_changes: int, scene_size: int):
+        """
+        :param frame_time: wall time of the frame in seconds
+        """
+        self._frames.append(FrameStats(time.perf_counter(), frame_time, drawn, culled, state_changes))
+        if frame_time * 1000 > self.slow_frame_threshold:
+            self.slow_frames += 1
+            logger.warning(
+                'Slow frame: %.1f ms (%d shapes in the scene, %d drawn, %d culled, %d painter state changes)',
+                frame_time * 1000, scene_size, drawn, culled, state_changes
+            )
+
+    def fps(self) -> int:
+        # Number of frames painted during the last second
+        second_ago = time.perf_counter() - 1
+        return sum(1 for frame in self._frames if frame.end > second_ago)
+
+    def histogram(self) -> Dict[str, int]:
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for frame in self._frames:
+            frame_ms = frame.frame_time * 1000
+            bucket = next(
+                (i for i, high in enumerate(HISTOGRAM_BUCKETS) if frame_ms < high),
+                len(HISTOGRAM_BUCKETS)
+            )
+            counts[bucket] += 1
+
+        lows = [0, *HISTOGRAM_BUCKETS]
+        labels = [f'{low}-{high} ms' for low, high in zip(lows, HISTOGRAM_BUCKETS)] + [f'{lows[-1]}+ ms']
+        return dict(zip(labels, counts))
+
+    def summary(self) -> List[str]:
+        if not self._frames:
+            return ['No frames painted yet']
+
+        frames = len(self._frames)
+        lines = [
+            f'Frames: {frames} (last {self._frames.maxlen} kept), {self.fps()} FPS',
+            f'Frame time: avg {sum(f.frame_time for f in self._frames) / frames * 1000:.2f} ms, '
+            f'max {max(f.frame_time for f in self._frames) * 1000:.2f} ms',
+            f'Per frame: avg {sum(f.drawn for f in self._frames) / frames:.1f} shapes drawn, '
+            f'{sum(f.culled for f in self._frames) / frames:.1f} culled, '
+            f'{sum(f.state_changes for f in self._frames) / frames:.1f} painter state changes',
+            f'Slow frames (over {self.slow_frame_threshold} ms): {self.slow_frames}'
+        ]
+        for bucket, count in self.histogram().items():
+            lines.append(f'  {bucket}: {count}')
+        return lines
@@ -0,0 +1,478 @@
+import array
+import mmap
+import os
+import struct
+import sys
+from collections.abc import MutableSequence
+from typing import List, Dict, Tuple, Iterator, Optional
+
+from app.compression import open_file, decompressed, strip_codec_extension, CODEC_ERRORS
+from app.printers import Printer, segment_tolerance
+from app.shapes import Shape, Dot, Line, Polyline, Rectangle, Circle, DISTANCE_CONST_DOT
+from app.utils import Point, Color, BoundingBox
+
+
+# Files with this extension are binary scenes, all the others are scripts with commands
+SCENE_EXTENSION = '.cadb'
+SCENE_MAGIC = b'CADB'
+SCENE_VERSION = 1
+
+# Magic, version, reserved and number of sections
+HEADER = struct.Struct('<4sHHI')
+# Tag, number of records, offset and size (in bytes) of one section
+SECTION = struct.Struct('<4sIQQ')
+
+# Colors of the shapes, shapes refer to them by their index
+PALETTE_TAG = b'PALT'
+PALETTE_RECORD = struct.Struct('<BBBB')
+# Type tag of every shape in the order of the scene, shapes of each type are in their own section
+ORDER_TAG = b'ORDR'
+DOT_TAG = b'DOTS'
+DOT_RECORD = struct.Struct('<iiI')
+LINE_TAG = b'LINE'
+LINE_RECORD = struct.Struct('<iiiiI')
+# Number of points and the color, followed by the points
+POLYLINE_TAG = b'PLIN'
+POLYLINE_RECORD = struct.Struct('<II')
+POINT_RECORD = struct.Struct('<ii')
+RECT_TAG = b'RECT'
+RECT_RECORD = struct.Struct('<iiiiI')
+CIRCLE_TAG = b'CIRC'
+CIRCLE_RECORD = struct.Struct('<iiiI')
+
+SHAPE_TAGS = [DOT_TAG, LINE_TAG, POLYLINE_TAG, RECT_TAG, CIRCLE_TAG]
+DOT, LINE, POLYLINE, RECT, CIRCLE = range(len(SHAPE_TAGS))
+
+# Number of shapes between two positions of a mapped scene at which the number of preceding shapes
+# of every type is remembered
+CHECKPOINT_INTERVAL = 1024
+
+
+class SceneFormatError(ValueError):
+    pass
+
+
+def is_scene_file(path: str) -> bool:
+    # Compressed scenes are scenes too
+    return strip_codec_extension(path).lower().endswith(SCENE_EXTENSION)
+
+
+class ScenePrinter(Printer):
+    """
+    Packs the shapes into the sections of a binary scene (little-endian records, one section per type of the shapes).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._palette = {}
+        self.order = bytearray()
+        self.sections = {tag: bytearray() for tag in [PALETTE_TAG] + SHAPE_TAGS}
+        self.counts = {tag: 0 for tag in [PALETTE_TAG] + SHAPE_TAGS}
+
+    def _color_index(self, color: Color) -> int:
+        key = tuple(color)
+        index = self._palette.get(key)
+        if index is None:
+            index = self._palette[key] = len(self._palette)
+            self._add(PALETTE_TAG, PALETTE_RECORD, *key)
+        return index
+
+    def _add(self, tag: bytes, record: struct.Struct, *values):
+        try:
+            self.sections[tag] += record.pack(*values)
+        except struct.error as e:
+            raise SceneFormatError(f'Shape can not be stored in the binary scene: {e}')
+        self.counts[tag] += 1
+
+    def _add_shape(self, tag: bytes, record: struct.Struct, *values):
+        self.order.append(SHAPE_TAGS.index(tag))
+        self._add(tag, record, *values)
+
+    def print_dot(self, dot: Dot):
+        self._add_shape(DOT_TAG, DOT_RECORD, *dot.get_props(), self._color_index(dot.color))
+
+    def print_line(self, line: Line):
+        self._add_shape(LINE_TAG, LINE_RECORD, *line.get_props(), self._color_index(line.color))
+
+    def print_polyline(self, polyline: Polyline):
+        self._add_shape(POLYLINE_TAG, POLYLINE_RECORD, len(polyline.points), self._color_index(polyline.color))
+        for point in polyline.points:
+            try:
+                self.sections[POLYLINE_TAG] += POINT_RECORD.pack(point.x, point.y)
+            except struct.error as e:
+                raise SceneFormatError(f'Shape can not be stored in the binary scene: {e}')
+
+    def print_rectangle(self, rect: Rectangle):
+        self._add_shape(RECT_TAG, RECT_RECORD, *rect.get_props(), self._color_index(rect.color))
+
+    def print_circle(self, circle: Circle):
+        self._add_shape(CIRCLE_TAG, CIRCLE_RECORD, *circle.get_props(), self._color_index(circle.color))
+
+
+def save_scene(file: str, shapes: List[Shape]):
+    printer = ScenePrinter()
+    for shape in shapes:
+        shape.print_to(printer)
+
+    sections = [(PALETTE_TAG, printer.counts[PALETTE_TAG], printer.sections[PALETTE_TAG]),
+                (ORDER_TAG, len(printer.order), printer.order)]
+    sections += [(tag, printer.counts[tag], printer.sections[tag]) for tag in SHAPE_TAGS]
+
+    # Compressed (if the extension says so) as the sections are written
+    with open_file(file, 'wb') as f:
+        f.write(HEADER.pack(SCENE_MAGIC, SCENE_VERSION, 0, len(sections)))
+        offset = HEADER.size + SECTION.size * len(sections)
+        for tag, count, data in sections:
+            f.write(SECTION.pack(tag, count, offset, len(data)))
+            offset += len(data)
+        for _, _, data in sections:
+            f.write(data)
+
+
+def read_sections(data) -> Dict[bytes, Tuple[int, memoryview]]:
+    """
+    :param data: whole file
+    :return: number of records and data of every section by its tag
+    """
+    data = memoryview(data)
+    if len(data) < HEADER.size:
+        raise SceneFormatError('File is not a binary scene!')
+    magic, version, _, section_count = HEADER.unpack_from(data)
+    if magic != SCENE_MAGIC:
+        raise SceneFormatError('File is not a binary scene!')
+    if version > SCENE_VERSION:
+        raise SceneFormatError(f'Binary scene of version {version} is not supported!')
+
+    sections = {}
+    for i in range(section_count):
+        tag, count, offset, size = SECTION.unpack_from(data, HEADER.size + i * SECTION.size)
+        if offset + size > len(data):
+            raise SceneFormatError('Binary scene is truncated!')
+        sections[tag] = (count, data[offset:offset + size])
+    return sections
+
+
+def _polylines(data: memoryview, count: int, palette: List[Color]) -> Iterator[Polyline]:
+    offset = 0
+    for _ in range(count):
+        point_count, color = POLYLINE_RECORD.unpack_from(data, offset)
+        offset += POLYLINE_RECORD.size
+        points = [Point(x, y) for x, y in POINT_RECORD.iter_unpack(data[offset:offset + point_count * POINT_RECORD.size])]
+        offset += point_count * POINT_RECORD.size
+        yield Polyline(*points, color=palette[color])
+
+
+def load_scene(file: str) -> List[Shape]:
+    """
+    :return: shapes of the scene in their order (shapes of the same color share the Color object)
+    """
+    with open(file, 'rb') as f:
+        sections = read_sections(f.read())
+
+    empty = (0, memoryview(b''))
+    palette = [Color(*rgba) for rgba in PALETTE_RECORD.iter_unpack(sections.get(PALETTE_TAG, empty)[1])]
+    try:
+        shapes_by_type = [
+            (Dot(Point(x, y), palette[c]) for x, y, c in DOT_RECORD.iter_unpack(sections.get(DOT_TAG, empty)[1])),
+            (Line(Point(x1, y1), Point(x2, y2), palette[c])
+             for x1, y1, x2, y2, c in LINE_RECORD.iter_unpack(sections.get(LINE_TAG, empty)[1])),
+            _polylines(sections.get(POLYLINE_TAG, empty)[1], sections.get(POLYLINE_TAG, empty)[0], palette),
+            (Rectangle(Point(x, y), w, h, palette[c])
+             for x, y, w, h, c in RECT_RECORD.iter_unpack(sections.get(RECT_TAG, empty)[1])),
+            (Circle(Point(x, y), r, palette[c])
+             for x, y, r, c in CIRCLE_RECORD.iter_unpack(sections.get(CIRCLE_TAG, empty)[1])),
+        ]
+        return [next(shapes_by_type[tag]) for tag in sections.get(ORDER_TAG, empty)[1]]
+    except (IndexError, StopIteration, struct.error, ValueError) as e:
+        raise SceneFormatError(f'Binary scene is corrupted: {e}')
+
+
+def _int_column(data: memoryview):
+    """
+    :return: 32-bit integers of the records (read straight from the data on little-endian machines)
+    """
+    if sys.byteorder == 'little':
+        return data.cast('i')
+    column = array.array('i', data)
+    column.byteswap()
+    return column
+
+
+class MappedScene:
+    """
+    Binary scene mapped into the memory. Coordinates are read straight from the mapping and a shape is created
+    only when it's needed for the first time (it's kept since then, so the same shape is returned every time).
+    Opening the scene doesn't depend on the size of the records, only the types of the shapes are scanned once.
+    Compressed scene is decompressed into a temporary file first, which is mapped instead.
+    """
+
+    def __init__(self, file: str):
+        try:
+            f = decompressed(file)
+        except CODEC_ERRORS as e:
+            raise SceneFormatError(f'Binary scene can not be decompressed: {e}')
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise SceneFormatError('File is not a binary scene!')
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        sections = read_sections(self._mmap)
+
+        empty = (0, memoryview(b''))
+        self._palette = [Color(*rgba) for rgba in PALETTE_RECORD.iter_unpack(sections.get(PALETTE_TAG, empty)[1])]
+        self._order = sections.get(ORDER_TAG, empty)[1]
+        self._polylines = sections.get(POLYLINE_TAG, empty)
+        # Polylines have different sizes, so their offsets are found when the first one is needed
+        self._polyline_offsets = None
+        self._columns = {}
+        for shape_type, record in [(DOT, DOT_RECORD), (LINE, LINE_RECORD), (RECT, RECT_RECORD),
+                                   (CIRCLE, CIRCLE_RECORD)]:
+            count, data = sections.get(SHAPE_TAGS[shape_type], empty)
+            if len(data) != count * record.size:
+                raise SceneFormatError('Binary scene is corrupted: wrong size of a section')
+            self._columns[shape_type] = _int_column(data)
+
+        # Numbers of the preceding shapes of every type at every checkpoint
+        self._checkpoints = array.array('Q')
+        counts = [0] * len(SHAPE_TAGS)
+        for start in range(0, len(self._order), CHECKPOINT_INTERVAL):
+            self._checkpoints.extend(counts)
+            block = bytes(self._order[start:start + CHECKPOINT_INTERVAL])
+            for shape_type in range(len(SHAPE_TAGS)):
+                counts[shape_type] += block.count(shape_type)
+        if (
+            sum(counts) != len(self._order) or
+            any(counts[shape_type] > sections.get(tag, empty)[0] for shape_type, tag in enumerate(SHAPE_TAGS))
+        ):
+            raise SceneFormatError('Binary scene is corrupted: wrong order of the shapes')
+
+        self._shapes = {}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def created(self) -> int:
+        """
+        Number of shapes created so far.
+        """
+        return len(self._shapes)
+
+    def _records(self, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """
+        :return: position, type and the index of the record (among the shapes of the type) of the shapes
+        from `start` to `end`
+        """
+        block_start = start - start % CHECKPOINT_INTERVAL
+        preceding = bytes(self._order[block_start:start])
+        checkpoint = block_start // CHECKPOINT_INTERVAL * len(SHAPE_TAGS)
+        counts = [
+            self._checkpoints[checkpoint + shape_type] + preceding.count(shape_type)
+            for shape_type in range(len(SHAPE_TAGS))
+        ]
+        for position, shape_type in enumerate(self._order[start:end], start):
+            yield position, shape_type, counts[shape_type]
+            counts[shape_type] += 1
+
+    def _polyline_offset(self, index: int) -> int:
+        if self._polyline_offsets is None:
+            count, data = self._polylines
+            offsets = array.array('Q')
+            offset = 0
+            for _ in range(count):
+                offsets.append(offset)
+                point_count, _ = POLYLINE_RECORD.unpack_from(data, offset)
+                offset += POLYLINE_RECORD.size + point_count * POINT_RECORD.size
+            self._polyline_offsets = offsets
+        return self._polyline_offsets[index]
+
+    def _polyline_points(self, index: int) -> Tuple[List[Tuple[int, int]], int]:
+        data = self._polylines[1]
+        offset = self._polyline_offset(index)
+        point_count, color = POLYLINE_RECORD.unpack_from(data, offset)
+        offset += POLYLINE_RECORD.size
+        return list(POINT_RECORD.iter_unpack(data[offset:offset + point_count * POINT_RECORD.size])), color
+
+    def _create(self, shape_type: int, index: int) -> Shape:
+        if shape_type == POLYLINE:
+            points, color = self._polyline_points(index)
+            return Polyline(*[Point(x, y) for x, y in points], color=self._palette[color])
+
+        column = self._columns[shape_type]
+        if shape_type == DOT:
+            x, y, color = column[3 * index:3 * index + 3]
+            return Dot(Point(x, y), self._palette[color])
+        elif shape_type == CIRCLE:
+            x, y, radius, color = column[4 * index:4 * index + 4]
+            return Circle(Point(x, y), radius, self._palette[color])
+        a, b, c, d, color = column[5 * index:5 * index + 5]
+        if shape_type == LINE:
+            return Line(Point(a, b), Point(c, d), self._palette[color])
+        return Rectangle(Point(a, b), c, d, self._palette[color])
+
+    def _shape(self, position: int, shape_type: int, index: int) -> Shape:
+        shape = self._shapes.get(position)
+        if shape is None:
+            try:
+                shape = self._shapes[position] = self._create(shape_type, index)
+            except (IndexError, struct.error, ValueError) as e:
+                raise SceneFormatError(f'Binary scene is corrupted: {e}')
+        return shape
+
+    def _bounds(self, shape_type: int, index: int) -> Tuple[int, int, int, int]:
+        """
+        :return: bounding box (left, top, right, bottom) of the shape, computed straight from its record
+        """
+        if shape_type == POLYLINE:
+            points, _ = self._polyline_points(index)
+            xs = [x for x, _ in points]
+            ys = [y for _, y in points]
+            return min(xs), min(ys), max(xs), max(ys)
+
+        column = self._columns[shape_type]
+        if shape_type == DOT:
+            x, y = column[3 * index], column[3 * index + 1]
+            return x, y, x, y
+        elif shape_type == CIRCLE:
+            x, y, radius = column[4 * index:4 * index + 3]
+            return x - radius, y - radius, x + radius, y + radius
+        a, b, c, d = column[5 * index:5 * index + 4]
+        if shape_type == LINE:
+            return min(a, c), min(b, d), max(a, c), max(b, d)
+        return a, b, a + c, b + d
+
+    def shape(self, position: int) -> Shape:
+        return next(self.shapes(position, position + 1))
+
+    def shapes(self, start: int, end: int) -> Iterator[Shape]:
+        for position, shape_type, index in self._records(start, end):
+            yield self._shape(position, shape_type, index)
+
+    def visible_shapes(self, start: int, end: int, viewport: BoundingBox) -> Iterator[Optional[Shape]]:
+        """
+        :return: shapes from `start` to `end` which intersect the viewport, None instead of each of the others
+        (which are not created at all)
+        """
+        for position, shape_type, index in self._records(start, end):
+            left, top, right, bottom = self._bounds(shape_type, index)
+            if left <= viewport.right and viewport.left <= right and top <= viewport.bottom and viewport.top <= bottom:
+                yield self._shape(position, shape_type, index)
+            else:
+                yield None
+
+    def shapes_near(self, start: int, end: int, point: Point) -> Iterator[Shape]:
+        """
+        :return: shapes from `start` to `end` which can contain the point (even with the divergence),
+        the others are not created at all
+        """
+        for position, shape_type, index in self._records(start, end):
+            left, top, right, bottom = self._bounds(shape_type, index)
+            # Any segment of the shape is at most as long as the diagonal of its bounding box
+            diagonal = ((right - left) ** 2 + (bottom - top) ** 2) ** 0.5
+            margin = max(segment_tolerance(diagonal), DISTANCE_CONST_DOT) + 1
+            if left - margin <= point.x <= right + margin and top - margin <= point.y <= bottom + margin:
+                yield self._shape(position, shape_type, index)
+
+
+class MappedShapes(MutableSequence):
+    """
+    Shapes of a mapped scene followed by the shapes added later. The mapped shapes are used (and created only
+    when needed) as long as the shapes are just added to or removed from the end, any other change creates
+    all of them.
+    """
+
+    def __init__(self, scene: MappedScene, mapped: int = None, added: List[Shape] = None):
+        """
+        :param mapped: number of the shapes of the scene which are used (all of them by default)
+        """
+        self.scene = scene
+        self._mapped = mapped if mapped is not None else len(scene)
+        self._added = added if added is not None else []
+
+    @property
+    def mapped(self) -> int:
+        return self._mapped
+
+    def copy(self) -> 'MappedShapes':
+        return MappedShapes(self.scene, self._mapped, list(self._added))
+
+    def __deepcopy__(self, memo) -> 'MappedShapes':
+        # Shapes are never changed (moving creates a new one), so they can be shared by the copies
+        return self.copy()
+
+    def __len__(self) -> int:
+        return self._mapped + len(self._added)
+
+    def __iter__(self) -> Iterator[Shape]:
+        yield from self.scene.shapes(0, self._mapped)
+        yield from self._added
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            stop = max(start, stop)
+            return list(self.scene.shapes(start, min(stop, self._mapped))) + \
+                self._added[max(start - self._mapped, 0):max(stop - self._mapped, 0)]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Shape index out of range')
+        if index < self._mapped:
+            return self.scene.shape(index)
+        return self._added[index - self._mapped]
+
+    def __setitem__(self, index, value):
+        self._materialize()
+        self._added[index] = value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            removes_end = step == 1 and stop >= len(self)
+        else:
+            start = index + len(self) if index < 0 else index
+            removes_end = start == len(self) - 1
+        if removes_end and start >= self._mapped:
+            del self._added[start - self._mapped:]
+        elif removes_end:
+            self._mapped = max(start, 0)
+            self._added = []
+        else:
+            self._materialize()
+            del self._added[index]
+
+    def insert(self, index: int, value: Shape):
+        if index < len(self):
+            self._materialize()
+            self._added.insert(index, value)
+        else:
+            self._added.append(value)
+
+    def _materialize(self):
+        self._added = list(self)
+        self._mapped = 0
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def visible_shapes(self, start: int, end: int, viewport: BoundingBox) -> Tuple[List[Shape], int]:
+        """
+        :return: shapes from `start` to `end` which intersect the viewport and the number of the others
+        """
+        end = min(end, len(self))
+        visible = [
+            shape for shape in self.scene.visible_shapes(start, min(end, self._mapped), viewport)
+            if shape is not None
+        ]
+        visible += [
+            shape for shape in self._added[max(start - self._mapped, 0):max(end - self._mapped, 0)]
+            if viewport.intersects(shape.bounding_box())
+        ]
+        return visible, max(end - start, 0) - len(visible)
+
+    def shapes_at(self, point: Point, divergence: bool = False) -> List[Shape]:
+        near = self.scene.shapes_near(0, self._mapped, point)
+        return [shape for shape in near if shape.contains(point, divergence)] + \
+            [shape for shape in self._added if shape.contains(point, divergence)]
@@ -1,7 +1,7 @@
 import math
 from typing import Tuple
 
-from app.utils import Point, distance, Color
+from app.utils import Point, distance, Color, BoundingBox
 
 
 DISTANCE_CONST = 0.025
@@ -26,6 +26,9 @@ class Shape:
     def contains(self, point: Point, divergence: bool = False) -> bool:
         raise NotImplementedError
 
+    def bounding_box(self) -> BoundingBox:
+        raise NotImplementedError
+
     def move(self, move_from: Point, move_to: Point):
         return Shape(self.start - (move_from - move_to), self.color)
 
@@ -60,6 +63,9 @@ class Dot(Shape):
         else:
             return self.start == point
 
+    def bounding_box(self) -> BoundingBox:
+        return BoundingBox(self.start.x, self.start.y, self.start.x, self.start.y)
+
     def move(self, move_from: Point, move_to: Point):
         return Dot(move_to, self.color)
 
@@ -92,6 +98,12 @@ class Line(Shape):
                 distance(self.start, self.end)
             )
 
+    def bounding_box(self) -> BoundingBox:
+        return BoundingBox(
+            min(self.start.x, self.end.x), min(self.start.y, self.end.y),
+            max(self.start.x, self.end.x), max(self.start.y, self.end.y)
+        )
+
     def move(self, move_from: Point, move_to: Point):
         new_start = super().move(move_from, move_to).start
         new_end = self.end - (self.start - new_start)
@@ -140,6 +152,11 @@ class Polyline(Shape):
                     return True
             return False
 
+    def bounding_box(self) -> BoundingBox:
+        xs = [point.x for point in self.points]
+        ys = [point.y for point in self.points]
+        return BoundingBox(min(xs), min(ys), max(xs), max(ys))
+
     def move(self, move_from: Point, move_to: Point):
         new_start = super().move(move_from, move_to).start
         new_points = []
@@ -176,6 +193,9 @@ class Rectangle(Shape):
             self.start.y <= point.y <= self.start.y + self.height
         )
 
+    def bounding_box(self) -> BoundingBox:
+        return BoundingBox(self.start.x, self.start.y, self.start.x + self.width, self.start.y + self.height)
+
     def move(self, move_from: Point, move_to: Point):
         new_start = super().move(move_from, move_to).start
         return Rectangle(new_start, self.width, self.height, self.color)
@@ -205,6 +225,12 @@ class Circle(Shape):
     def contains(self, point: Point, divergence: bool = False) -> bool:
         return distance(self.start, point) <= self.radius
 
+    def bounding_box(self) -> BoundingBox:
+        return BoundingBox(
+            self.start.x - self.radius, self.start.y - self.radius,
+            self.start.x + self.radius, self.start.y + self.radius
+        )
+
     def move(self, move_from: Point, move_to: Point):
         new_start = super().move(move_from, move_to).start
         return Circle(new_start, self.radius, self.color)
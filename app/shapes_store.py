@@ -1,9 +1,18 @@
 import copy
+import itertools
+import time
 from typing import List, Dict
 
 from app.shapes import Shape
 from app.printers import Printer
-from app.utils import Point
+from app.scene_file import MappedShapes
+from app.utils import Point, BoundingBox
+
+
+# Shared among all the stores, so even a brand new store has a different generation than the one it replaces
+_generations = itertools.count()
+# How many shapes are printed between two checks of the deadline in `print_chunk`
+CHUNK_SIZE = 256
 
 
 class ShapesStore:
@@ -17,24 +26,49 @@ class ShapesStore:
         self._shapes = shapes or []
         self._controller = controller
         self._preview = None
+        # Number of shapes skipped by the last `print_all` because they were outside of the viewport
+        self.culled = 0
+        # Changes whenever the stored shapes change (but not when only the preview changes)
+        self.generation = next(_generations)
 
     def _notify(self):
         self._controller.update()
 
+    def _changed(self):
+        self.generation = next(_generations)
+        self._notify()
+
     def is_empty(self) -> bool:
         return len(self._shapes) == 0
 
+    def is_mapped(self) -> bool:
+        """
+        :return: True if the shapes are (at least partly) read from a mapped binary scene
+        """
+        return isinstance(self._shapes, MappedShapes) and self._shapes.mapped > 0
+
     def shapes_at(self, point: Point = None, divergence: bool = False) -> List[Shape]:
-        if point:
+        if point and isinstance(self._shapes, MappedShapes):
+            # Only the shapes which are close enough are created
+            return self._shapes.shapes_at(point, divergence)
+        elif point:
             return [shape for shape in self._shapes if shape.contains(point, divergence)]
         else:
             return self._shapes
 
-    def print_all(self, printer: Printer, point: Point = None) -> List[Shape]:
+    def print_all(self, printer: Printer, point: Point = None, viewport: BoundingBox = None) -> List[Shape]:
         printed = []
+        self.culled = 0
+        shapes = self._shapes
+        if viewport and isinstance(shapes, MappedShapes):
+            # Shapes of a mapped scene outside of the viewport are skipped without being created
+            shapes, self.culled = shapes.visible_shapes(0, len(shapes), viewport)
         # Order is important - first we want to print all stored shapes and after that the shape preview
-        for shape in self._shapes:
-            if point and shape.contains(point):
+        for shape in shapes:
+            if viewport and not viewport.intersects(shape.bounding_box()):
+                # Shape is not visible at all, there's no point in drawing it
+                self.culled += 1
+            elif point and shape.contains(point):
                 shape.print_to(printer)
                 printed.append(shape)
             elif not point:
@@ -42,9 +76,41 @@ class ShapesStore:
                 printed.append(shape)
         if self._preview is not None:
             self._preview.print_to(printer)
+        printer.flush()
 
         return printed
 
+    def print_chunk(self, printer: Printer, start: int, viewport: BoundingBox, deadline: float) -> int:
+        """
+        Print stored shapes (without the preview) from index `start` until all are printed or the `deadline`
+        (in terms of `time.perf_counter()`) passes.
+        :return: index of the first shape which wasn't printed
+        """
+        self.culled = 0
+        end = start
+        while end < len(self._shapes):
+            if isinstance(self._shapes, MappedShapes):
+                shapes, culled = self._shapes.visible_shapes(end, end + CHUNK_SIZE, viewport)
+                self.culled += culled
+            else:
+                shapes = self._shapes[end:end + CHUNK_SIZE]
+            for shape in shapes:
+                if viewport.intersects(shape.bounding_box()):
+                    shape.print_to(printer)
+                else:
+                    self.culled += 1
+            end = min(end + CHUNK_SIZE, len(self._shapes))
+            if time.perf_counter() > deadline:
+                break
+        printer.flush()
+
+        return end
+
+    def print_preview(self, printer: Printer):
+        if self._preview is not None:
+            self._preview.print_to(printer)
+            printer.flush()
+
     def set_preview(self, shape: Shape = None):
         self._preview = shape
         self._notify()
@@ -52,7 +118,18 @@ class ShapesStore:
     def add_shapes(self, *shapes: Shape):
         for shape in shapes:
             self._shapes.append(copy.deepcopy(shape))
-        self._notify()
+        self._changed()
+
+    def add_loaded_shapes(self, shapes: List[Shape]):
+        """
+        Add many shapes at once. They are not copied, so they must not be changed by anyone else.
+        """
+        if self.is_empty() and isinstance(shapes, MappedShapes):
+            # Shapes of a mapped scene are kept mapped (the copy can be changed without changing the given shapes)
+            self._shapes = shapes.copy()
+        else:
+            self._shapes.extend(shapes)
+        self._changed()
 
     def move_shapes(self, move_from: Point, move_to: Point, divergence: bool = False) -> Dict[str, List[Shape]]:
         before_move = copy.deepcopy(self._shapes)
@@ -70,15 +147,20 @@ class ShapesStore:
     def remove_last_shape(self):
         try:
             self._shapes.pop()
-            self._notify()
+            self._changed()
         except IndexError:
             pass
 
+    def remove_last_shapes(self, number_of_shapes: int):
+        if number_of_shapes > 0:
+            del self._shapes[-number_of_shapes:]
+            self._changed()
+
     def _remove_shapes(self, *shapes: Shape):
         try:
             for shape in shapes:
                 self._shapes.remove(shape)
-            self._notify()
+            self._changed()
         except ValueError:
             pass
 
@@ -94,4 +176,4 @@ class ShapesStore:
     def restart(self):
         self._shapes = []
         self._preview = None
-        self._notify()
+        self._changed()
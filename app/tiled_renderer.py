@@ -0,0 +1,96 @@
+import math
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QPainter, QTransform
+
+from app.canvas import Canvas
+from app.printers import ImagePrinter
+
+
+# Size (in pixels) of one square tile
+TILE_SIZE = 256
+# Number of extra pixels rendered around every tile. Qt rounds edges of shapes cut by the image border
+# differently, so the tiles are rendered a bit bigger and only their middle is kept
+TILE_OVERLAP = 8
+# Maximal number of cached tiles (one tile takes 256 kB)
+MAX_TILES = 256
+
+
+class TiledRenderer:
+    """
+    Draws the shapes into square tiles of the zoomed scene and caches them, keyed by the zoom level and
+    the position of the tile, so panning (and zooming back) only blits already rendered tiles. Tiles
+    are rendered only when they show up in the canvas. Any change of the scene throws all the tiles away.
+    """
+
+    def __init__(self, canvas: Canvas, controller, max_tiles: int = MAX_TILES):
+        self._canvas = canvas
+        self._controller = controller
+        self._max_tiles = max_tiles
+        self._tiles = OrderedDict()
+        self._generation = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def _render_tile(self, zoom_level: int, tile_x: int, tile_y: int) -> int:
+        size = TILE_SIZE + 2 * TILE_OVERLAP
+        image = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+
+        # Same transformation as the canvas uses, just moved to the tile, which is always by whole pixels
+        zoom = self._canvas.zoom
+        transform = QTransform.fromTranslate(
+            TILE_OVERLAP - tile_x * TILE_SIZE, TILE_OVERLAP - tile_y * TILE_SIZE
+        )
+        transform.scale(zoom, zoom)
+        printer = ImagePrinter(image, transform)
+        # Drawing all the shapes at once, only the preview is not part of the tiles
+        self._controller.print_shapes_chunk(printer, 0, printer.viewport(), math.inf)
+
+        self._tiles[(zoom_level, tile_x, tile_y)] = image.copy(TILE_OVERLAP, TILE_OVERLAP, TILE_SIZE, TILE_SIZE)
+        while len(self._tiles) > self._max_tiles:
+            self._tiles.popitem(last=False)
+        return len(self._controller.shapes_at()) - self._controller.culled_shapes()
+
+    def paint(self) -> int:
+        """
+        Show the tiles covering the visible part of the canvas (rendering the missing ones)
+        with the preview on top of them.
+        :return: number of shapes drawn
+        """
+        generation = self._controller.scene_generation()
+        if generation != self._generation:
+            self._generation = generation
+            self._tiles.clear()
+
+        zoom_level = self._canvas.zoom_level
+        offset = self._canvas.offset
+        visible = self._canvas.visibleRegion().boundingRect().translated(offset)
+        if visible.isEmpty():
+            visible = QRect(offset, self._canvas.size())
+
+        drawn = 0
+        painter = QPainter(self._canvas)
+        for tile_y in range(visible.top() // TILE_SIZE, visible.bottom() // TILE_SIZE + 1):
+            for tile_x in range(visible.left() // TILE_SIZE, visible.right() // TILE_SIZE + 1):
+                key = (zoom_level, tile_x, tile_y)
+                if key in self._tiles:
+                    self.hits += 1
+                    self._tiles.move_to_end(key)
+                else:
+                    self.misses += 1
+                    drawn += self._render_tile(*key)
+                painter.drawImage(
+                    tile_x * TILE_SIZE - offset.x(), tile_y * TILE_SIZE - offset.y(), self._tiles[key]
+                )
+        painter.end()
+        self._controller.print_preview()
+
+        return drawn
+
+    def stop(self):
+        self._tiles.clear()
@@ -1,5 +1,5 @@
 import math
-from typing import Iterator
+from typing import Iterator, Sequence, List
 
 
 class Point:
@@ -39,6 +39,34 @@ class Color:
         return f'Color({self.r}, {self.g}, {self.b}, alpha={self.alpha})'
 
 
+class BoundingBox:
+    """
+    Axis-aligned rectangle given by its edges (all of them inclusive).
+    """
+
+    def __init__(self, left: int, top: int, right: int, bottom: int):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+
+    def intersects(self, other) -> bool:
+        return (
+            self.left <= other.right and other.left <= self.right
+            and
+            self.top <= other.bottom and other.top <= self.bottom
+        )
+
+    def __eq__(self, other) -> bool:
+        return (
+            self.left == other.left and self.top == other.top and
+            self.right == other.right and self.bottom == other.bottom
+        )
+
+    def __repr__(self) -> str:
+        return f'BoundingBox({self.left}, {self.top}, {self.right}, {self.bottom})'
+
+
 class Singleton(type):
     _instances = {}
 
@@ -53,3 +81,39 @@ class Singleton(type):
 
 def distance(a: Point, b: Point):
     return math.sqrt((a.x - b.x)**2 + (a.y - b.y)**2)
+
+
+def distance_to_segment(point: Point, a: Point, b: Point) -> float:
+    length_squared = (b.x - a.x)**2 + (b.y - a.y)**2
+    if length_squared == 0:
+        return distance(point, a)
+    # Projection of the point onto the segment (clamped to its ends)
+    t = max(0, min(1, ((point.x - a.x) * (b.x - a.x) + (point.y - a.y) * (b.y - a.y)) / length_squared))
+    return math.sqrt((point.x - a.x - t * (b.x - a.x))**2 + (point.y - a.y - t * (b.y - a.y))**2)
+
+
+def simplify_polyline(points: Sequence[Point], tolerance: float) -> List[Point]:
+    """
+    Douglas-Peucker simplification - drop the points which are closer than `tolerance`
+    to the simplified polyline. The first and the last point are always kept.
+    """
+    if len(points) < 3:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    # Iterative instead of recursive, polylines can have thousands of points
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest, max_distance = None, tolerance
+        for i in range(first + 1, last):
+            d = distance_to_segment(points[i], points[first], points[last])
+            if d > max_distance:
+                farthest, max_distance = i, d
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from PyQt5 import QtWidgets
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.controller import Controller
+from app.scene_file import SCENE_EXTENSION
+from parser_benchmark import write_script
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Measure how fast a file with commands is loaded into the app.')
+    parser.add_argument('--file', help='file with commands to load (default is a generated one)')
+    parser.add_argument('--lines', type=int, default=100000, help='number of generated lines (default %(default)s)')
+    parser.add_argument('--binary', action='store_true',
+                        help='also save the loaded scene as a binary scene and measure loading of it')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    file = args.file
+    if file is None:
+        # Only the shapes, the other commands (e.g. "clear") may need some interaction with the user
+        file = os.path.join(tempfile.mkdtemp(), 'benchmark.txt')
+        write_script(file, args.lines, shapes_only=True)
+    with open(file) as f:
+        lines = sum(1 for _ in f)
+
+    app = QtWidgets.QApplication([])
+
+    def measure_load(path: str) -> Controller:
+        controller = Controller()
+        controller.run_app()
+        start = time.perf_counter()
+        controller.load(path)
+        loaded = time.perf_counter()
+        # Loading is finished when the loaded scene is painted
+        app.processEvents()
+        painted = time.perf_counter()
+        shapes = len(controller.shapes_at())
+        print(f'{os.path.basename(path)}: {lines} lines ({shapes} shapes) loaded in {loaded - start:.2f} s '
+              f'(+ {painted - loaded:.2f} s the first paint)')
+        print(f'{lines / (painted - start):.0f} lines/s ({lines / (loaded - start):.0f} lines/s without painting)')
+        if controller._shapes.is_mapped():
+            # Shapes of a binary scene are created only when they are painted
+            print(f'{controller.shapes_at().scene.created} of {shapes} shapes created')
+        return controller
+
+    controller = measure_load(file)
+    if args.binary:
+        scene = os.path.splitext(file)[0] + SCENE_EXTENSION
+        controller.save(scene)
+        print(f'Script has {os.path.getsize(file)} bytes, binary scene {os.path.getsize(scene)} bytes')
+        controller.quit()
+        measure_load(scene)
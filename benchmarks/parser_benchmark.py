@@ -0,0 +1,95 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Iterator
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.parsers.cli_parser import CliParser
+from app.parsers.color_parser import RgbColorParser
+from app.parsers.table_parser import TableCliParser
+
+
+ENGINES = {'combinator': CliParser, 'table': TableCliParser}
+
+
+def point(rnd: random.Random) -> str:
+    if rnd.random() < 0.2:
+        return f'{rnd.choice("+-")}{rnd.randint(0, 50)},{rnd.choice("+-")}{rnd.randint(0, 50)}'
+    return f'{rnd.randint(0, 1000)},{rnd.randint(0, 1000)}'
+
+
+def color(rnd: random.Random) -> str:
+    return rnd.choice(['', f' rgb({rnd.randint(0, 255)},{rnd.randint(0, 255)},{rnd.randint(0, 255)})'])
+
+
+def generate_lines(count: int, seed: int = 0, shapes_only: bool = False) -> Iterator[str]:
+    """
+    Mix of all the commands (mostly shapes) as they appear in saved files and typed scripts.
+    :param shapes_only: generate only the commands creating shapes
+    """
+    rnd = random.Random(seed)
+    generators = [
+        lambda: f'dot {point(rnd)}{color(rnd)}',
+        lambda: f'line {point(rnd)} {point(rnd)}{color(rnd)}',
+        lambda: 'line ' + ' '.join(point(rnd) for _ in range(rnd.randint(3, 8))) + color(rnd),
+        lambda: f'rect {point(rnd)} {point(rnd)}{color(rnd)}',
+        lambda: f'rect {point(rnd)} {rnd.randint(1, 100)} {rnd.randint(1, 100)}{color(rnd)}',
+        lambda: f'circle {point(rnd)} {point(rnd)}{color(rnd)}',
+        lambda: f'circle {point(rnd)} {rnd.randint(1, 100)}{color(rnd)}',
+        lambda: f'move {point(rnd)} {point(rnd)}',
+        lambda: f'remove {point(rnd)}',
+        lambda: rnd.choice(['ls', f'ls {point(rnd)}', 'clear', 'dot 10,']),
+    ]
+    weights = [20, 20, 10, 15, 10, 10, 5, 4, 3, 3]
+    if shapes_only:
+        generators, weights = generators[:7], weights[:7]
+    for _ in range(count):
+        yield rnd.choices(generators, weights)[0]()
+
+
+def write_script(file: str, count: int, seed: int = 0, shapes_only: bool = False):
+    with open(file, 'w') as f:
+        for line in generate_lines(count, seed, shapes_only):
+            f.write(line + '\n')
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Measure how fast the command line parser is.')
+    parser.add_argument('--file', help='file with commands to parse (default is a generated one)')
+    parser.add_argument('--lines', type=int, default=1000000, help='number of generated lines (default %(default)s)')
+    parser.add_argument('--engine', choices=ENGINES, default='table', help='parsing engine (default %(default)s)')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='number of lines remembered by the table engine (default %(default)s)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    file = args.file
+    if file is None:
+        file = os.path.join(tempfile.mkdtemp(), 'benchmark.txt')
+        write_script(file, args.lines)
+
+    # Commands are only created, never executed, so they don't need any controller
+    if args.engine == 'table':
+        cli_parser = TableCliParser(None, RgbColorParser(), cache_size=args.cache_size)
+    else:
+        cli_parser = CliParser(None, RgbColorParser())
+    lines = tokens = 0
+    start = time.perf_counter()
+    with open(file) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            cli_parser.parse_input(line)
+            lines += 1
+            tokens += len(line.split())
+    elapsed = time.perf_counter() - start
+
+    print(f'{lines} lines, {tokens} tokens parsed in {elapsed:.2f} s')
+    print(f'{lines / elapsed:.0f} lines/s, {tokens / elapsed:.0f} tokens/s')
+    if args.engine == 'table' and args.cache_size > 0:
+        print(f'Parse cache hit ratio {cli_parser.hits / lines * 100:.1f} %')
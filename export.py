@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+
+# Rendering into an image doesn't need any display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import QRectF
+
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+from app.exporter import HeadlessController, SceneExporter, TILE_PIXELS
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Render a scene described by a command script into a PNG image.')
+    parser.add_argument('script', help='file with commands (e.g. saved from the app)')
+    parser.add_argument('output', help='PNG file to write')
+    parser.add_argument('--region', help='exported part of the scene as LEFT,TOP,RIGHT,BOTTOM '
+                                         '(default is the bounding box of all shapes)')
+    parser.add_argument('--size', help='size of the image in pixels as WIDTHxHEIGHT (default is the size '
+                                       'of the region, i.e. scale 1:1)')
+    parser.add_argument('--tile-pixels', type=int, default=TILE_PIXELS,
+                        help='maximal number of pixels rendered at once (default %(default)s)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    app = QtWidgets.QApplication([])
+
+    controller = HeadlessController()
+    controller.load(args.script)
+
+    if args.region:
+        left, top, right, bottom = (float(n) for n in args.region.split(','))
+    else:
+        box = controller.scene_bounding_box()
+        left, top, right, bottom = box.left, box.top, box.right + 1, box.bottom + 1
+    region = QRectF(left, top, right - left, bottom - top)
+
+    if args.size:
+        width, height = (int(n) for n in args.size.lower().split('x'))
+    else:
+        width, height = int(region.width()), int(region.height())
+
+    SceneExporter(controller, args.tile_pixels).export(args.output, region, width, height)
@@ -0,0 +1,174 @@
+import gzip
+import io
+
+import pytest
+
+from app.compression import open_file
+from app.controller import Controller
+from app.scene_file import save_scene
+from app.shapes import Dot, Rectangle, Line
+from app.utils import Point, Color, BoundingBox
+
+
+def test_load(controller: Controller, stream: io.StringIO, tmp_path):
+    file = tmp_path / 'scene.txt'
+    file.write_text(
+        'dot 10,10\nrect 0,0 20 30 rgb(1,2,3)\nremove 500,500\nline 30,30 +10,+10\nmove 35,35 +5,+5\ndot 20,20',
+        encoding='utf-8'
+    )
+
+    controller.load(str(file))
+
+    shapes = list(controller.shapes_at())
+    assert shapes == [
+        Dot(Point(10, 10), Color(0, 0, 0)), Rectangle(Point(0, 0), 20, 30, Color(1, 2, 3)),
+        Line(Point(35, 35), Point(45, 45), Color(0, 0, 0)), Dot(Point(20, 20), Color(0, 0, 0))
+    ]
+    # The scene has been repainted only once, at the end of the load
+    assert stream.getvalue() == ''.join(f'{shape}\n' for shape in shapes)
+    # Consecutive shapes are loaded at once, nothing has been removed, so the remove command is not in the history
+    history = [
+        ' > dot 10,10', ' > rect 0,0 20 30 rgb(1,2,3)', f'{shapes[0]}', f'{shapes[1]}',
+        ' > line 30,30 +10,+10', f'{Line(Point(30, 30), Point(40, 40), Color(0, 0, 0))}',
+        ' > move 35,35 +5,+5',
+        ' > dot 20,20', f'{shapes[3]}',
+    ]
+    assert controller._gui._ui.history.toPlainText() == '\n'.join(history)
+    assert controller._gui._ui.actionUndo.isEnabled() is True
+    assert controller._gui._ui.actionRedo.isEnabled() is False
+
+    controller.undo()
+    controller.undo()
+    controller.undo()
+    assert controller.shapes_at() == shapes[:2]
+    assert controller._gui._ui.history.toPlainText() == '\n'.join(history[:4])
+
+    # Both shapes loaded at once are also undone (and redone) at once
+    controller.undo()
+    assert controller.shapes_at() == []
+    assert controller._gui._ui.history.toPlainText() == ''
+    assert controller._gui._ui.actionUndo.isEnabled() is False
+
+    controller.redo()
+    assert controller.shapes_at() == shapes[:2]
+    assert controller._gui._ui.history.toPlainText() == '\n'.join(history[:4])
+
+
+def test_save_loaded(controller: Controller, tmp_path):
+    file = tmp_path / 'scene.txt'
+    file.write_text('dot 10,10\nline 0,0 +10,+10 rgb(1,2,3)\n', encoding='utf-8')
+    controller.load(str(file))
+
+    saved = tmp_path / 'saved.txt'
+    controller.save(str(saved))
+    # Loaded lines are saved as they were
+    assert saved.read_text(encoding='utf-8') == 'dot 10,10\nline 0,0 +10,+10 rgb(1,2,3)\n'
+
+
+def test_save_and_load_scene(controller: Controller, tmp_path):
+    file = tmp_path / 'scene.txt'
+    file.write_text('dot 50,50\nline 0,0 +10,+10 rgb(1,2,3)\nremove 50,50\nrect 1,2 3 4\n', encoding='utf-8')
+    controller.load(str(file))
+    shapes = list(controller.shapes_at())
+
+    scene = str(tmp_path / 'scene.cadb')
+    controller.save(scene)
+    assert controller._gui.statusBar().currentMessage() == 'File saved!'
+
+    controller.undo()
+    controller.undo()
+    controller.undo()
+    assert controller.shapes_at() == []
+    controller._gui.clear_history()
+
+    # Only the resulting scene is loaded, at once
+    controller.load(scene)
+    assert controller.shapes_at() == shapes
+    assert controller._gui._ui.history.toPlainText() == f' > load {scene}\n2 shapes loaded'
+    controller.undo()
+    assert controller.shapes_at() == []
+    assert controller._gui._ui.history.toPlainText() == ''
+    controller.redo()
+    assert controller.shapes_at() == shapes
+    assert controller._gui._ui.history.toPlainText() == f' > load {scene}\n2 shapes loaded'
+
+    # Commands creating the loaded shapes are saved to a script
+    script = tmp_path / 'saved.txt'
+    controller.save(str(script))
+    assert script.read_text(encoding='utf-8') == 'line 0,0 10,10 rgb(1,2,3)\nrect 1,2 3 4 rgb(0,0,0)\n'
+
+
+@pytest.mark.parametrize('extension', ['.gz', '.bz2', '.xz'])
+def test_save_and_load_compressed(extension: str, controller: Controller, tmp_path):
+    controller.parse_command('dot 10,10')
+    controller.parse_command('line 0,0 +10,+10 rgb(1,2,3)')
+    shapes = list(controller.shapes_at())
+
+    script = str(tmp_path / f'scene.txt{extension}')
+    scene = str(tmp_path / f'scene.cadb{extension}')
+    controller.save(script)
+    controller.save(scene)
+    with open_file(script, 'rt', encoding='utf-8') as f:
+        assert f.read() == 'dot 10,10 rgb(0,0,0)\nline 0,0 10,10 rgb(1,2,3)\n'
+
+    controller.undo()
+    controller.undo()
+    for file in [script, scene]:
+        assert controller.shapes_at() == []
+        controller.load(file)
+        assert controller._gui.statusBar().currentMessage() == 'File loaded!'
+        assert controller.shapes_at() == shapes
+        controller.undo()
+
+
+def test_load_corrupted_compressed(controller: Controller, tmp_path):
+    controller.parse_command('dot 5,5')
+    shapes = list(controller.shapes_at())
+
+    file = tmp_path / 'bad.txt.gz'
+    file.write_text('dot 10,10\n', encoding='utf-8')
+    controller.load(str(file))
+    assert controller._gui.statusBar().currentMessage().startswith('File not loaded: ')
+    assert controller.shapes_at() == shapes
+
+    # Commands loaded before the corrupted part of the file are taken back
+    with gzip.open(file, 'wt', encoding='utf-8') as f:
+        f.writelines(f'dot {i},{i}\nmove {i},{i} +1,+1\n' for i in range(100, 20000))
+    file.write_bytes(file.read_bytes()[:-1000])
+    controller.load(str(file))
+    assert controller._gui.statusBar().currentMessage().startswith('File not loaded: ')
+    assert controller.shapes_at() == shapes
+    assert controller._gui._ui.history.toPlainText() == f' > dot 5,5\n{shapes[0]}'
+    assert len(controller._command_engine.get_all_commands()['undos']) == 1
+
+    controller.load(str(tmp_path / 'missing.txt'))
+    assert controller._gui.statusBar().currentMessage().startswith('File not loaded: ')
+
+
+def test_load_scene_lazily(controller: Controller, tmp_path):
+    scene = str(tmp_path / 'scene.cadb')
+    save_scene(scene, [Dot(Point(x, 10), Color(0, 0, 0)) for x in range(0, 10000, 10)])
+    controller.load(scene)
+
+    assert len(controller.shapes_at()) == 1000
+    assert controller.shapes_at(Point(500, 10)) == [Dot(Point(500, 10), Color(0, 0, 0))]
+    assert controller.shapes_at(Point(502, 11), divergence=True) == [Dot(Point(500, 10), Color(0, 0, 0))]
+    printed = controller.print_all_shapes(viewport=BoundingBox(0, 0, 95, 95))
+    assert printed == [Dot(Point(x, 10), Color(0, 0, 0)) for x in range(0, 100, 10)]
+    assert controller._shapes.culled == 990
+
+    # Changing the scene works as with any other shapes
+    controller.parse_command('move 500,10 +0,+5')
+    assert controller.shapes_at(Point(500, 15)) == [Dot(Point(500, 15), Color(0, 0, 0))]
+    assert len(controller.shapes_at()) == 1000
+    controller.undo()
+    assert controller.shapes_at(Point(500, 15)) == []
+    assert controller.shapes_at(Point(500, 10)) == [Dot(Point(500, 10), Color(0, 0, 0))]
+
+
+def test_load_invalid_scene(controller: Controller, tmp_path):
+    file = tmp_path / 'scene.cadb'
+    file.write_text('dot 10,10\n', encoding='utf-8')
+    controller.load(str(file))
+    assert controller.shapes_at() == []
+    assert controller._gui.statusBar().currentMessage() == 'File not loaded: File is not a binary scene!'
@@ -0,0 +1,22 @@
+from app.controller import Controller
+
+
+def test_parse_cache(controller: Controller):
+    controller.parse_command('dot 10,10')
+    controller.parse_command('dot 10,10')
+    shapes = controller.shapes_at()
+    assert len(shapes) == 2 and shapes[0] is not shapes[1]
+
+    controller.undo()
+    assert len(controller.shapes_at()) == 1
+
+    controller.parse_command('stats parser')
+    assert controller._gui._ui.history.toPlainText().endswith(
+        'Parse cache: 2 of 1024 lines cached, hit ratio 33.3 % (1 hits, 2 misses)'
+    )
+
+
+def test_parse_cache_disabled(controller: Controller):
+    controller._cli_parser.cache_size = 0
+    controller.parse_command('stats parser')
+    assert controller._gui._ui.history.toPlainText().endswith('Parse cache: disabled')
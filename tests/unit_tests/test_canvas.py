@@ -1,24 +1,32 @@
 from typing import List
 
 import pytest
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QPoint
 
-from app.canvas import Canvas
+from app.canvas import Canvas, MAX_ZOOM_LEVEL
 from app.brushes import LineShapeBrush, RectShapeBrush, DotShapeBrush, CircleShapeBrush, MoveShapeBrush
 from app.commands import Command, PrintDotCommand, PrintRectCommand
 from app.gui import MainWindow
 from app.shape_factory import PointsRectFactory
 from app.shapes import Shape, Line, Rectangle
-from app.utils import Point, Color
+from app.utils import Point, Color, BoundingBox
 
 
 class ControllerMockup:
     def __init__(self):
         self.all_shapes = None
+        self.viewport = None
         self.command = None
+        self.previews = []
+        self.frame = None
 
-    def print_all_shapes(self):
+    def print_all_shapes(self, viewport: BoundingBox = None) -> List[Shape]:
         self.all_shapes = 'printed all shapes'
+        self.viewport = viewport
+        return []
+
+    def frame_painted(self, frame_time: float, drawn: int):
+        self.frame = (frame_time, drawn)
 
     def execute_command(self, command: Command):
         self.command = command
@@ -26,6 +34,9 @@ class ControllerMockup:
     def end_preview(self):
         pass
 
+    def preview_shape(self, shape: Shape):
+        self.previews.append(shape)
+
     def shapes_at(self, point: Point, divergence: bool = False) -> List[Shape]:
         return [Line(Point(0, 0), Point(0, 10), Color(10, 20, 30)), Rectangle(Point(0, 5), 10, 10, Color(0, 0, 0))]
 
@@ -44,6 +55,22 @@ class EventMockup:
         return Qt.LeftButton
 
 
+class MoveEventMockup:
+    def __init__(self, x: int, y: int, buttons: Qt.MouseButtons = Qt.NoButton):
+        self._x = x
+        self._y = y
+        self._buttons = buttons
+
+    def x(self) -> int:
+        return self._x
+
+    def y(self) -> int:
+        return self._y
+
+    def buttons(self) -> Qt.MouseButtons:
+        return self._buttons
+
+
 @pytest.fixture
 def canvas(qtbot) -> Canvas:
     controller = ControllerMockup()
@@ -89,6 +116,15 @@ def test_set_color(canvas: Canvas):
 def test_pain_event(canvas: Canvas):
     canvas.paintEvent(EventMockup)
     assert canvas._controller.all_shapes == 'printed all shapes'
+    assert canvas._controller.viewport == canvas.visible_rect()
+    assert canvas._controller.frame[0] > 0
+    assert canvas._controller.frame[1] == 0
+
+
+def test_visible_rect(canvas: Canvas):
+    canvas.resize(200, 100)
+    canvas.show()
+    assert canvas.visible_rect() == BoundingBox(-5, -5, 205, 105)
 
 
 def test_mouse_move_event(canvas: Canvas):
@@ -132,3 +168,90 @@ def test_mouse_press_event(canvas: Canvas):
             end_x=EventMockup.x(), end_y=EventMockup.y()
         )
     )
+
+
+def test_mouse_move_compression(canvas: Canvas, qtbot):
+    canvas.set_brush(LineShapeBrush())
+    canvas.mousePressEvent(EventMockup)
+    for x in range(11, 16):
+        canvas.mouseMoveEvent(MoveEventMockup(x, 20))
+
+    # Nothing is applied until the next frame, then only the latest move
+    assert canvas._controller.previews == []
+    qtbot.waitUntil(lambda: len(canvas._controller.previews) == 1)
+    assert canvas._controller.previews[0] == Line(Point(10, 20), Point(15, 20), Color(255, 255, 255, 200))
+    assert canvas.skipped_moves == 4
+
+    # Press must not overtake the pending move
+    canvas.mouseMoveEvent(MoveEventMockup(30, 40))
+    canvas.mousePressEvent(EventMockup)
+    assert canvas._controller.previews[1] == Line(Point(10, 20), Point(30, 40), Color(255, 255, 255, 200))
+    assert canvas.skipped_moves == 4
+
+
+def test_mouse_move_latency(canvas: Canvas, qtbot):
+    canvas.set_brush(LineShapeBrush())
+    canvas.mousePressEvent(EventMockup)
+    canvas.mouseMoveEvent(MoveEventMockup(50, 50))
+    # The mockup controller doesn't repaint anything, so there's nothing to measure
+    qtbot.waitUntil(lambda: len(canvas._controller.previews) == 1)
+    canvas.paintEvent(EventMockup)
+    assert len(canvas.move_latencies) == 0
+
+    canvas._controller.preview_shape = lambda shape: canvas.request_paint()
+    canvas.mouseMoveEvent(MoveEventMockup(60, 60))
+    qtbot.waitUntil(lambda: canvas._painted_move_time is not None)
+    canvas.paintEvent(EventMockup)
+    assert len(canvas.move_latencies) == 1
+    assert canvas.move_latencies[0] > 0
+
+
+def test_zoom_and_pan(canvas: Canvas):
+    canvas.resize(200, 100)
+    assert canvas.zoom == 1
+    assert canvas.map_to_scene(10, 20) == (10, 20)
+
+    # Zooming 2 times around [50, 50], the scene point under it stays there
+    canvas.zoom_by(4, 50, 50)
+    assert canvas.zoom == 2
+    assert canvas.map_to_scene(50, 50) == (50, 50)
+    assert canvas.map_to_scene(10, 20) == (30, 35)
+    assert canvas.scene_transform().map(30.0, 35.0) == (10, 20)
+    assert canvas.scene_rect(canvas.rect()) == BoundingBox(20, 20, 130, 80)
+
+    canvas.pan_by(-100, 20)
+    assert canvas.offset == QPoint(-50, 70)
+    assert canvas.map_to_scene(10, 20) == (-20, 45)
+
+    # Brushes get the scene coordinates
+    canvas.set_brush(RectShapeBrush())
+    canvas.mousePressEvent(EventMockup)
+    canvas.mousePressEvent(MoveEventMockup(30, 40, Qt.LeftButton))
+    assert canvas._controller.command == PrintRectCommand(
+        receiver=canvas._controller,
+        start_x=-20, start_y=45,
+        color=(255, 255, 255),
+        rect_factory=PointsRectFactory,
+        end_x=-10, end_y=55
+    )
+
+    canvas.zoom_by(100)
+    assert canvas.zoom_level == MAX_ZOOM_LEVEL
+    canvas.reset_view()
+    assert canvas.zoom == 1
+    assert canvas.offset == QPoint(0, 0)
+
+
+def test_middle_button_pan(canvas: Canvas):
+    canvas.set_brush(LineShapeBrush())
+    canvas.mousePressEvent(MoveEventMockup(50, 50, Qt.MiddleButton))
+    canvas.mouseMoveEvent(MoveEventMockup(40, 70, Qt.MiddleButton))
+    assert canvas.offset == QPoint(10, -20)
+    # Panning is not seen by the brush
+    assert canvas._pending_move is None
+    assert canvas._controller.previews == []
+
+    canvas.mouseReleaseEvent(MoveEventMockup(40, 70))
+    canvas.mouseMoveEvent(MoveEventMockup(0, 0))
+    assert canvas.offset == QPoint(10, -20)
+    assert canvas._pending_move[:2] == (10, -20)
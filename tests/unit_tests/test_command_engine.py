@@ -115,6 +115,24 @@ def test_redo(command_engine: CommandEngine):
     assert c2.executed == 2
 
 
+def test_rollback(command_engine: CommandEngine):
+    first, second, third, redone = (CommandMockup(None) for _ in range(4))
+    command_engine.execute_command(first)
+    command_engine._redos = [redone]
+    checkpoint = command_engine.checkpoint()
+
+    command_engine.execute_command(second)
+    command_engine.execute_command(third)
+    assert command_engine._redos == []
+
+    command_engine.rollback(checkpoint)
+    assert command_engine._undos == [first]
+    assert command_engine._redos == [redone]
+    assert (first.reversed, second.reversed, third.reversed) == (0, 1, 1)
+    assert command_engine._controller.undo is True
+    assert command_engine._controller.redo is True
+
+
 def test_get_all_commands(command_engine: CommandEngine):
     c1 = CommandMockup('receiver')
     c2 = CommandMockup(123)
@@ -5,7 +5,7 @@ import pytest
 
 from app.commands import Command, PrintDotCommand, PrintLineCommand, PrintRectCommand, PrintCircleCommand, \
     PrintPolylineCommand, RemoveShapeCommand, ListShapeCommand, MoveShapeCommand, InvalidCommand, ClearCommand, \
-    SaveCommand, LoadCommand, QuitCommand
+    SaveCommand, LoadCommand, QuitCommand, StatsCommand, LoadedShapesCommand
 from app.shapes import Shape, Dot, Line, Rectangle, Circle, Polyline
 from app.utils import Point, Color
 
@@ -56,9 +56,15 @@ class ReceiverMockup:
     def replace_shapes_store(self, shapes: List[Shape]):
         self.received = shapes
 
+    def add_loaded_shapes(self, shapes: List[Shape]):
+        self.received = shapes
+
     def remove_last_shape(self):
         self.received = None
 
+    def remove_last_shapes(self, number_of_shapes: int):
+        self.received = number_of_shapes
+
     def remove_last_command(self):
         self.last_command_removed = True
 
@@ -80,6 +86,10 @@ class ReceiverMockup:
     def shapes_at(self, point: Point = None) -> List[Shape]:
         return [Line(Point(10, 10), Point(20, 20), Color(1, 2, 3)), Dot(Point(10, 10), Color(1, 2, 3))]
 
+    def print_stats(self, topic: str) -> int:
+        self.printed += f'{topic} stats'
+        return 3
+
     def restart(self):
         self.restarted = True
 
@@ -309,6 +319,30 @@ def test_circle_command_with_dimensions(receiver: ReceiverMockup):
     assert receiver.deleted_lines == 2
 
 
+def test_loaded_shapes_command(receiver: ReceiverMockup):
+    shapes = [
+        Dot(Point(0, -12), Color(1, 2, 3)), Line(Point(1, 2), Point(3, 4), Color(0, 0, 0)),
+        Polyline(Point(1, 2), Point(3, 4), Point(5, 6), color=Color(0, 0, 0)),
+        Rectangle(Point(1, 2), 3, 4, Color(0, 0, 0)), Circle(Point(1, 2), 3, Color(0, 0, 0))
+    ]
+    command = LoadedShapesCommand(receiver, shapes)
+    assert str(command) == (
+        'dot 0,-12 rgb(1,2,3)\nline 1,2 3,4 rgb(0,0,0)\nline 1,2 3,4 5,6 rgb(0,0,0)\n'
+        'rect 1,2 3 4 rgb(0,0,0)\ncircle 1,2 3 rgb(0,0,0)'
+    )
+    assert command == LoadedShapesCommand(receiver, list(shapes))
+    assert command != LoadedShapesCommand(receiver, shapes[:1])
+    assert str(LoadedShapesCommand(receiver, shapes[:2], 'dot +0,-12 rgb(1,2,3)\nline 1,2 +2,+2')) == \
+        'dot +0,-12 rgb(1,2,3)\nline 1,2 +2,+2'
+
+    command.execute()
+    assert receiver.received == shapes
+
+    command.reverse()
+    assert receiver.received == 5
+    assert receiver.deleted_lines == 10
+
+
 def test_not_equals(receiver: ReceiverMockup):
     assert (
         PrintDotCommand(receiver, 0, 0, (0, 0, 0))
@@ -455,6 +489,20 @@ def test_list_shape_command(receiver: ReceiverMockup):
     assert receiver.deleted_lines == len(command.listed) + 1
 
 
+def test_stats_command(receiver: ReceiverMockup):
+    command = StatsCommand(receiver, 'render')
+    assert str(command) == 'stats render'
+    assert command == StatsCommand(receiver, 'render')
+    assert command != StatsCommand(receiver, 'something')
+
+    command.execute()
+    assert receiver.printed == 'render stats'
+    assert command.printed == 3
+
+    command.reverse()
+    assert receiver.deleted_lines == 4
+
+
 def test_save_command(receiver: ReceiverMockup):
     command = SaveCommand(receiver, '/test/example/path_to_some_file.txt')
     assert str(command) == 'save /test/example/path_to_some_file.txt'
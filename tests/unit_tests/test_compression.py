@@ -0,0 +1,42 @@
+import gzip
+import lzma
+
+import pytest
+
+from app.compression import codec_of, strip_codec_extension, open_file, decompressed, CODEC_ERRORS
+
+
+def test_codec_of():
+    assert codec_of('scene.txt.gz') is gzip
+    assert codec_of('/some/path/SCENE.CADB.XZ') is lzma
+    assert codec_of('scene.txt') is None
+    assert codec_of('gz') is None
+
+
+def test_strip_codec_extension():
+    assert strip_codec_extension('scene.txt.bz2') == 'scene.txt'
+    assert strip_codec_extension('scene.cadb.LZMA') == 'scene.cadb'
+    assert strip_codec_extension('scene.txt') == 'scene.txt'
+
+
+@pytest.mark.parametrize('extension', ['', '.gz', '.bz2', '.xz', '.lzma'])
+def test_open_file(extension: str, tmp_path):
+    file = str(tmp_path / f'scene.txt{extension}')
+    lines = [f'dot {i},{i} rgb(1,2,3)\n' for i in range(1000)]
+    with open_file(file, 'wt', encoding='utf-8') as f:
+        f.writelines(lines)
+
+    with open_file(file, 'rt', encoding='utf-8') as f:
+        assert list(f) == lines
+    with decompressed(file) as f:
+        assert f.read() == ''.join(lines).encode('utf-8')
+    if extension:
+        # Repeated lines are compressed well
+        assert (tmp_path / f'scene.txt{extension}').stat().st_size < len(''.join(lines)) / 4
+
+
+def test_decompress_invalid_file(tmp_path):
+    file = tmp_path / 'scene.txt.gz'
+    file.write_bytes(b'dot 10,10\n')
+    with pytest.raises(CODEC_ERRORS):
+        decompressed(str(file))
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage, QColor
+from pytestqt.qtbot import QtBot
+
+from app.commands import ClearCommand
+from app.exporter import HeadlessController, SceneExporter
+from app.utils import BoundingBox
+
+
+@pytest.fixture
+def controller(qtbot: QtBot) -> HeadlessController:
+    controller = HeadlessController()
+    qtbot.addWidget(controller._gui)
+    return controller
+
+
+def test_headless_controller(controller: HeadlessController):
+    with pytest.raises(ValueError):
+        controller.scene_bounding_box()
+
+    controller.parse_command('rect 10,10 50 50')
+    controller.parse_command('circle 0,100 20')
+    assert controller.scene_bounding_box() == BoundingBox(-20, 10, 60, 120)
+
+    # Clearing doesn't wait for the user's confirmation
+    controller.execute_command(ClearCommand(controller))
+    assert controller.shapes_at(None) == []
+
+
+def test_export(controller: HeadlessController):
+    controller.parse_command('rect 10,10 50 50 rgb(255,0,0)')
+    controller.parse_command('line 0,0 100,100 0,100 rgb(0,0,255)')
+    controller.parse_command('dot 90,10 rgb(0,255,0)')
+
+    whole_file = 'test_export_whole.png'
+    tiled_file = 'test_export_tiled.png'
+    SceneExporter(controller).export(whole_file, QRectF(0, 0, 100, 100), 300, 300)
+    # Only 7 rows are rendered at once
+    SceneExporter(controller, tile_pixels=2100).export(tiled_file, QRectF(0, 0, 100, 100), 300, 300)
+
+    whole = QImage(whole_file)
+    tiled = QImage(tiled_file)
+    assert whole.width() == 300
+    assert whole.height() == 300
+    assert whole == tiled
+    assert whole.pixelColor(90, 60) == QColor(255, 0, 0)
+    assert whole.pixelColor(270, 30) == QColor(0, 255, 0)
+    assert whole.pixelColor(290, 5) == QColor(255, 255, 255)
+
+    with pytest.raises(ValueError):
+        SceneExporter(controller).export(whole_file, QRectF(0, 0, 0, 100), 300, 300)
+
+    os.remove(whole_file)
+    os.remove(tiled_file)
@@ -144,6 +144,22 @@ def test_delete_from_history(gui: MainWindow):
         gui.delete_from_history(123)
 
 
+def test_delete_from_history_multiline(gui: MainWindow):
+    gui.print_lines_to_history('line1')
+    gui.print_lines_to_history('line2\nline3')
+    gui.print_lines_to_history('')
+    gui.print_lines_to_history('line5')
+
+    gui.delete_from_history(2)
+    assert gui._ui.history.toPlainText() == 'line1\nline2\nline3'
+    assert gui._ui.history.model().rowCount() == 3
+
+    gui.delete_from_history(2)
+    assert gui._ui.history.toPlainText() == 'line1'
+    gui.print_lines_to_history('line2')
+    assert gui._ui.history.toPlainText() == 'line1\nline2'
+
+
 def test_clear_history(gui: MainWindow):
     gui.print_lines_to_history('line1')
     gui.print_lines_to_history('line2')
@@ -152,3 +168,15 @@ def test_clear_history(gui: MainWindow):
 
     gui.clear_history()
     assert gui._ui.history.toPlainText() == ''
+
+
+def test_show_fps(gui: MainWindow):
+    assert gui._fps_label.isHidden() is True
+
+    gui.action_show_fps.trigger()
+    gui.show_fps(60)
+    assert gui._fps_label.isHidden() is False
+    assert gui._fps_label.text() == '60 FPS'
+
+    gui.action_show_fps.trigger()
+    assert gui._fps_label.isHidden() is True
@@ -0,0 +1,63 @@
+import pytest
+from PyQt5.QtCore import Qt
+
+from app.history import HistoryModel, HistoryView
+
+
+@pytest.fixture
+def model(qtbot) -> HistoryModel:
+    return HistoryModel(cap=3)
+
+
+def test_append(model: HistoryModel):
+    assert model.rowCount() == 0
+    model.append('line1')
+    model.append('line2\nline3')
+    assert model.rowCount() == 3
+    assert model.lines() == ['line1', 'line2', 'line3']
+    assert model._log is None
+
+    # Older lines are moved to the log, but they are still there
+    model.append('line4\nline5')
+    assert model.rowCount() == 5
+    assert len(model._lines) == 3
+    assert model.lines() == ['line1', 'line2', 'line3', 'line4', 'line5']
+    assert model.data(model.index(0)) == 'line1'
+    assert model.data(model.index(4)) == 'line5'
+    assert model.data(model.index(0), Qt.ToolTipRole) is None
+
+
+def test_remove_last(model: HistoryModel):
+    for i in range(1, 8):
+        model.append(f'line{i}')
+
+    model.remove_last(2)
+    assert model.lines() == ['line1', 'line2', 'line3', 'line4', 'line5']
+
+    # Removing more lines than there are in memory cuts off the log
+    model.remove_last(3)
+    assert model.lines() == ['line1', 'line2']
+    model.append('line3\nline4\nline5\nline6')
+    assert model.lines() == ['line1', 'line2', 'line3', 'line4', 'line5', 'line6']
+
+    with pytest.raises(ValueError):
+        model.remove_last(7)
+
+    model.remove_last(6)
+    assert model.rowCount() == 0
+
+
+def test_clear(model: HistoryModel):
+    model.append('line1\nline2\nline3\nline4')
+    model.clear()
+    assert model.rowCount() == 0
+    assert model._log is None
+    model.append('line1')
+    assert model.lines() == ['line1']
+
+
+def test_history_view(model: HistoryModel, qtbot):
+    view = HistoryView(model)
+    qtbot.addWidget(view)
+    model.append('line1\nline2\nline3\nline4')
+    assert view.toPlainText() == 'line1\nline2\nline3\nline4'
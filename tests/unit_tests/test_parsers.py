@@ -1,6 +1,9 @@
+import random
+
 import pytest
 
 from app.parsers.cli_parser import CliParser
+from app.parsers.table_parser import TableCliParser
 from app.parsers.low_level_parsers import StringParser, NatParser, IntParser
 from app.parsers.point_parsers import ParserPoint
 from app.parsers.parse_results import Success, Failure
@@ -10,7 +13,7 @@ from app.parsers.command_parsers import CommandParser
 from app.controller import Controller
 from app.commands import PrintDotCommand, PrintRectCommand, PrintCircleCommand, PrintLineCommand, PrintPolylineCommand, \
     RemoveShapeCommand, ListShapeCommand, MoveShapeCommand, ClearCommand, InvalidCommand, SaveCommand, LoadCommand,\
-    QuitCommand
+    QuitCommand, StatsCommand
 from app.shape_factory import DimensionsRectFactory, DimensionsCircleFactory
 
 
@@ -20,10 +23,11 @@ def controller() -> Controller:
     return controller
 
 
-@pytest.fixture
-def cli_parser() -> CliParser:
+@pytest.fixture(params=[CliParser, TableCliParser])
+def cli_parser(request) -> CliParser:
+    # Both parsing engines have to accept the same language and create the same commands
     controller: Controller = "controller"
-    return CliParser(controller, RgbColorParser())
+    return request.param(controller, RgbColorParser())
 
 # --------------- Low level parsers tests ---------------
 
@@ -566,6 +570,19 @@ def test_list_shape_parser(controller: Controller, cli_parser: CliParser):
         assert command == expected
 
 
+def test_stats_parser(controller: Controller, cli_parser: CliParser):
+    # Test valid inputs
+    assert cli_parser.parse_input("stats render") == StatsCommand(controller, "render")
+    assert cli_parser.parse_input("  stats   render  ") == StatsCommand(controller, "render")
+    assert cli_parser.parse_input("stats parser") == StatsCommand(controller, "parser")
+
+    # Test invalid inputs
+    assert cli_parser.parse_input("stats") == InvalidCommand(controller)
+    assert cli_parser.parse_input("stats something") == InvalidCommand(controller)
+    assert cli_parser.parse_input("stats render something") == InvalidCommand(controller)
+    assert cli_parser.parse_input("statsrender") == InvalidCommand(controller)
+
+
 def test_clear_parser(controller: Controller, cli_parser: CliParser):
     # Test valid inputs
     assert cli_parser.parse_input("clear") == ClearCommand(controller)
@@ -650,3 +667,59 @@ def test_points_conversion(controller: Controller):
         assert False
     except AttributeError:
         assert True
+
+
+def test_parsing_engines_equivalence(controller: Controller):
+    """
+    Test that TableCliParser creates the same commands as CliParser, also for (randomly) broken inputs.
+    """
+    combinator_parser = CliParser(controller, RgbColorParser())
+    table_parser = TableCliParser(controller, RgbColorParser())
+
+    lines = ['dot 10,20', 'dot +10,-20 rgb(1,2,3)', 'line 10,20 +5,+5', 'line 1,1 2,2 +3,-3 4,4 rgb(0,0,255)',
+             'rect 10,20 30,40', 'rect -5,+5 30 40 rgb(255,255,255)', 'circle 10,20 30,40 rgb(10,20,30)',
+             'circle 10,20 5', 'move 10,20 +5,+5', 'remove 10,20', 'ls', 'ls 10,20', 'clear', 'quit',
+             'stats render', 'save file.txt', 'load  some file ', '  rect 10 , 20   30\t40 ',
+             'line 10,20 30,40 50,60 rgb(1,2,3)x', 'rect 10,20 30\t40', 'circle\t10,20\t30 ']
+    characters = ' \t,+-019rgb()xe'
+    rnd = random.Random(0)
+    inputs = list(lines)
+    for _ in range(3000):
+        line = list(rnd.choice(lines))
+        for _ in range(rnd.randint(1, 3)):
+            position = rnd.randint(0, len(line))
+            operation = rnd.random()
+            if operation < 0.4 and line:
+                del line[min(position, len(line) - 1)]
+            elif operation < 0.8:
+                line.insert(position, rnd.choice(characters))
+            elif line:
+                line[min(position, len(line) - 1)] = rnd.choice(characters)
+        inputs.append(''.join(line))
+
+    for cli_input in inputs:
+        expected = combinator_parser.parse_input(cli_input)
+        actual = table_parser.parse_input(cli_input)
+        assert type(actual) is type(expected) and vars(actual) == vars(expected), cli_input
+
+
+def test_parse_cache(controller: Controller):
+    """
+    Test that TableCliParser remembers the latest lines, but always creates new commands.
+    """
+    parser = TableCliParser(controller, RgbColorParser(), cache_size=2)
+
+    first = parser.parse_input('dot 10,20 rgb(1,2,3)')
+    second = parser.parse_input('dot 10,20 rgb(1,2,3)')
+    assert first == second == PrintDotCommand(controller, 10, 20, (1, 2, 3))
+    assert first is not second and first.shape is not second.shape
+    assert parser.parse_input('ls') == ListShapeCommand(controller)
+    assert parser.parse_input('dot 10,') == InvalidCommand(controller)
+    assert parser.parse_input('dot 10,') == InvalidCommand(controller)
+    assert (parser.hits, parser.misses, len(parser)) == (2, 3, 2)
+
+    # The least recently used line has been forgotten
+    assert parser.parse_input('dot 10,20 rgb(1,2,3)') == first
+    assert (parser.hits, parser.misses, len(parser)) == (2, 4, 2)
+    assert parser.parse_input('dot 10,') == InvalidCommand(controller)
+    assert parser.hits == 3
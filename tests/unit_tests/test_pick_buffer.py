@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from app.pick_buffer import PickBuffer
+from app.shapes import Dot, Line, Polyline, Rectangle, Circle
+from app.shapes_store import ShapesStore
+from app.utils import Point, Color
+
+
+class ControllerMockup:
+    def update(self):
+        pass
+
+
+@pytest.fixture
+def store(qtbot) -> ShapesStore:
+    rnd = random.Random(42)
+    color = Color(0, 0, 0)
+    store = ShapesStore(ControllerMockup())
+    for _ in range(20):
+        store.add_shapes(
+            Dot(Point(rnd.randint(0, 200), rnd.randint(0, 200)), color),
+            Line(Point(rnd.randint(0, 200), rnd.randint(0, 200)), Point(rnd.randint(0, 200), rnd.randint(0, 200)), color),
+            Polyline(*[Point(rnd.randint(0, 200), rnd.randint(0, 200)) for _ in range(4)], color=color),
+            Rectangle(Point(rnd.randint(0, 200), rnd.randint(0, 200)), rnd.randint(0, 20), rnd.randint(0, 20), color),
+            Circle(Point(rnd.randint(0, 200), rnd.randint(0, 200)), rnd.randint(0, 10), color)
+        )
+    return store
+
+
+def assert_consistent(buffer: PickBuffer, store: ShapesStore):
+    buffer.sync(store)
+    for x in range(-20, 240, 3):
+        for y in range(-20, 240, 2):
+            point = Point(x, y)
+            shapes = store.shapes_at(point, divergence=True)
+            if shapes:
+                # Buffer never misses a shape
+                assert buffer.pick(point) is not None, point
+            if buffer.pick(point) is None:
+                assert shapes == []
+
+
+def test_pick_buffer(store: ShapesStore):
+    buffer = PickBuffer()
+    assert_consistent(buffer, store)
+    assert buffer.enabled is True
+    assert buffer.full_redraws == 1
+
+    # Topmost shape is picked
+    store.add_shapes(Rectangle(Point(50, 50), 10, 10, Color(0, 0, 0)))
+    buffer.sync(store)
+    assert buffer.pick(Point(55, 55)) is store.shapes_at()[-1]
+    assert buffer.partial_redraws == 1
+
+    # Only dirty regions are redrawn when shapes are moved and removed
+    store.move_shapes(Point(55, 55), Point(150, 20))
+    assert_consistent(buffer, store)
+    store.remove_shapes_at(Point(100, 100), divergence=True)
+    store.remove_last_shape()
+    assert_consistent(buffer, store)
+    assert buffer.full_redraws == 1
+    assert buffer.partial_redraws == 3
+
+    # The result is the same as if the buffer was drawn from scratch
+    fresh = PickBuffer()
+    fresh.sync(store)
+    for x in range(0, 200, 3):
+        for y in range(0, 200, 3):
+            assert buffer.pick(Point(x, y)) is fresh.pick(Point(x, y))
+
+    # Shape outside of the buffer makes it grow
+    store.add_shapes(Dot(Point(1000, 1000), Color(0, 0, 0)))
+    buffer.sync(store)
+    assert buffer.full_redraws == 2
+    assert buffer.pick(Point(1001, 1000)) is store.shapes_at()[-1]
+
+    store.restart()
+    buffer.sync(store)
+    assert buffer.pick(Point(1001, 1000)) is None
+
+
+def test_pick_buffer_too_big(store: ShapesStore):
+    buffer = PickBuffer(max_pixels=1000)
+    buffer.sync(store)
+    assert buffer.enabled is False
@@ -1,11 +1,16 @@
 import io
 import os
-from typing import Dict
+from typing import Dict, List
 
 import pytest
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage, QColor
 
-from app.printers import Printer, StreamTextPrinter, FileTextPrinter, AbstractTextPrinter
+from app.printers import Printer, StreamTextPrinter, FileTextPrinter, AbstractTextPrinter, CanvasPrinter, \
+    BatchCanvasPrinter, ImagePrinter, DisplayListCache, region_transform
+from app.shapes import Dot, Line, Polyline, Rectangle, Circle
 from app.shapes_store import Shape
+from app.utils import Point, Color, BoundingBox
 
 
 def test_abstract_printer():
@@ -78,3 +83,125 @@ def test_file_printer(shapes: Dict[str, Shape]):
 
 def test_canvas_printer(shapes: Dict[str, Shape]):
     ...
+
+
+def test_batch_canvas_printer(qtbot):
+    red = Color(255, 0, 0)
+    blue = Color(0, 0, 255, 200)
+    scene = [
+        Rectangle(Point(10, 10), 50, 50, red),
+        Rectangle(Point(30, 30), 50, 50, red),
+        Circle(Point(40, 40), 20, blue),
+        Dot(Point(40, 40), red),
+        Dot(Point(45, 40), red),
+        Line(Point(0, 0), Point(100, 100), blue),
+        Line(Point(100, 0), Point(0, 100), blue),
+        Polyline(Point(0, 50), Point(50, 0), Point(100, 50), color=red),
+        Rectangle(Point(60, 60), 30, 30, blue),
+        Circle(Point(50, 50), 10, blue),
+        Circle(Point(55, 55), 10, blue)
+    ]
+    images = []
+    for printer_class in [CanvasPrinter, BatchCanvasPrinter]:
+        image = QImage(100, 100, QImage.Format_ARGB32)
+        image.fill(QColor(255, 255, 255))
+        printer = printer_class(image)
+        for shape in scene:
+            shape.print_to(printer)
+        printer.flush()
+        images.append(image)
+
+    assert images[0] == images[1]
+
+
+def test_display_list_cache():
+    cache = DisplayListCache(max_bytes=100)
+    built = []
+
+    def build(shape: Shape):
+        built.append(shape)
+        return str(shape), 40
+
+    d1 = Dot(Point(1, 1), Color(0, 0, 0))
+    d2 = Dot(Point(1, 1), Color(0, 0, 0))
+    d3 = Dot(Point(3, 3), Color(0, 0, 0))
+
+    assert cache.get(d1, build) == str(d1)
+    assert cache.get(d1, build) == str(d1)
+    # Equal shape, but a different one (e.g. a replaced shape) gets its own entry
+    assert cache.get(d2, build) == str(d2)
+    assert built == [d1, d2]
+    assert cache.hits == 1
+    assert cache.misses == 2
+    assert cache.size == 80
+
+    # d1 has been used recently, so the least recently used d2 gets evicted
+    cache.get(d1, build)
+    cache.get(d3, build)
+    assert len(cache) == 2
+    assert cache.size == 80
+    cache.get(d2, build)
+    assert built == [d1, d2, d3, d2]
+
+
+def test_canvas_printer_display_lists(qtbot):
+    polyline = Polyline(Point(0, 50), Point(50, 0), Point(100, 50), color=Color(255, 0, 0))
+    circle = Circle(Point(50, 50), 10, Color(0, 0, 255))
+    image = QImage(100, 100, QImage.Format_ARGB32)
+    printer = BatchCanvasPrinter(image)
+
+    for _ in range(3):
+        polyline.print_to(printer)
+        circle.print_to(printer)
+        printer.flush()
+
+    assert len(printer.display_lists) == 2
+    assert printer.display_lists.misses == 2
+    assert printer.display_lists.hits == 4
+
+
+def test_polyline_level_of_detail(qtbot):
+    # Dense polyline, most of its points are closer to each other than one pixel
+    points = [Point(i // 10, (i // 10) % 2) for i in range(1000)]
+    polyline = Polyline(*points, color=Color(0, 0, 0))
+
+    printer = CanvasPrinter(QImage(100, 100, QImage.Format_ARGB32))
+    assert printer._polygon(polyline).size() == 100
+
+    # Zoomed out 10 times, whole zigzag fits into one pixel row
+    image = QImage(10, 10, QImage.Format_ARGB32)
+    printer = ImagePrinter(image, region_transform(QRectF(0, 0, 100, 100), image.rect()))
+    assert printer._polygon(polyline).size() == 2
+
+    # The shape itself stays untouched
+    assert polyline.points == tuple(points)
+    assert polyline.contains(Point(50, 0)) is True
+
+
+class ControllerMockup:
+    def __init__(self, scene: List[Shape]):
+        self.scene = scene
+        self.viewport = None
+
+    def print_all_shapes(self, printer: Printer, viewport: BoundingBox = None):
+        self.viewport = viewport
+        for shape in self.scene:
+            shape.print_to(printer)
+        printer.flush()
+
+
+def test_image_printer(qtbot):
+    controller = ControllerMockup([
+        Rectangle(Point(100, 100), 10, 10, Color(255, 0, 0)),
+        Dot(Point(150, 150), Color(0, 0, 255))
+    ])
+    image = QImage(200, 200, QImage.Format_RGBA8888)
+    # Region [100, 100] - [200, 200] of the scene scaled 2 times
+    printer = ImagePrinter(image, region_transform(QRectF(100, 100, 100, 100), image.rect()))
+    printer.update(controller)
+
+    assert controller.viewport == BoundingBox(97.5, 97.5, 202.5, 202.5)
+    assert image.pixelColor(10, 10) == QColor(255, 0, 0)
+    assert image.pixelColor(30, 30) == QColor(255, 255, 255)
+    assert image.pixelColor(100, 100) == QColor(0, 0, 255)
+    assert image.pixelColor(199, 199) == QColor(255, 255, 255)
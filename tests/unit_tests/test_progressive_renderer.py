@@ -0,0 +1,43 @@
+import pytest
+from pytestqt.qtbot import QtBot
+
+from app.controller import Controller
+from app.progressive_renderer import ProgressiveRenderer
+from app.shapes import Rectangle, Dot
+from app.utils import Point, Color
+
+
+@pytest.fixture
+def controller(qtbot: QtBot) -> Controller:
+    controller = Controller()
+    controller.run_app()
+    controller._gui.resize(800, 600)
+    qtbot.addWidget(controller._gui)
+    return controller
+
+
+def test_progressive_rendering(controller: Controller, qtbot: QtBot):
+    canvas = controller._gui.canvas
+    controller.add_shapes(*[Rectangle(Point(i % 700, i % 300), 20, 20, Color(i % 256, 0, 0)) for i in range(5000)])
+    qtbot.wait(10)
+    expected = canvas.grab().toImage()
+
+    canvas.set_progressive()
+    renderer: ProgressiveRenderer = canvas._renderer
+    # Draw as little as possible during every paint event
+    renderer._budget = 0
+    canvas.repaint()
+    assert renderer.finished is False
+
+    # The scene changes in the middle of the rendering
+    controller.add_shapes(Dot(Point(10, 10), Color(0, 255, 0)))
+    controller.add_shapes(Dot(Point(20, 10), Color(0, 255, 0)))
+    controller.remove_last_shape()
+    qtbot.waitUntil(lambda: renderer.finished)
+    progressive = canvas.grab().toImage()
+
+    canvas.set_progressive(False)
+    assert canvas._renderer is None
+    qtbot.wait(10)
+    assert progressive == canvas.grab().toImage()
+    assert progressive != expected
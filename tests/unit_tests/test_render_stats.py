@@ -0,0 +1,38 @@
+import logging
+
+from app.render_stats import RenderStats
+
+
+def test_record_frame(caplog):
+    stats = RenderStats(slow_frame_threshold=20, samples=3)
+    assert stats.summary() == ['No frames painted yet']
+
+    stats.record_frame(0.0005, drawn=10, culled=2, state_changes=4, scene_size=12)
+    stats.record_frame(0.005, drawn=20, culled=0, state_changes=6, scene_size=20)
+    with caplog.at_level(logging.WARNING):
+        stats.record_frame(0.1, drawn=30, culled=1, state_changes=8, scene_size=31)
+
+    assert stats.slow_frames == 1
+    assert len(caplog.records) == 1
+    assert '100.0 ms' in caplog.records[0].getMessage()
+    assert '31 shapes in the scene' in caplog.records[0].getMessage()
+    assert stats.fps() == 3
+
+    summary = stats.summary()
+    assert summary[0] == 'Frames: 3 (last 3 kept), 3 FPS'
+    assert summary[1] == 'Frame time: avg 35.17 ms, max 100.00 ms'
+    assert summary[2] == 'Per frame: avg 20.0 shapes drawn, 1.0 culled, 6.0 painter state changes'
+    assert summary[3] == 'Slow frames (over 20 ms): 1'
+
+    # Only the latest frames are kept
+    stats.record_frame(0.0001, drawn=0, culled=0, state_changes=0, scene_size=0)
+    assert stats.histogram() == {
+        '0-1 ms': 1,
+        '1-2 ms': 0,
+        '2-4 ms': 0,
+        '4-8 ms': 1,
+        '8-16 ms': 0,
+        '16-33 ms': 0,
+        '33-66 ms': 0,
+        '66+ ms': 1
+    }
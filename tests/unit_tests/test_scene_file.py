@@ -0,0 +1,154 @@
+import struct
+
+import pytest
+
+from app.scene_file import save_scene, load_scene, is_scene_file, read_sections, SceneFormatError, HEADER, \
+    SCENE_MAGIC, SCENE_VERSION, DOT_TAG, ORDER_TAG, PALETTE_TAG, MappedScene, MappedShapes, CHECKPOINT_INTERVAL
+from app.shapes import Dot, Line, Polyline, Rectangle, Circle
+from app.utils import Point, Color, BoundingBox
+
+
+@pytest.fixture
+def shapes():
+    return [
+        Rectangle(Point(0, 0), 1, 50000, Color(255, 255, 255)),
+        Dot(Point(10, 200000000), Color(1, 2, 3)),
+        Line(Point(1000, -1000), Point(0, -1000), Color(0, 0, 0)),
+        Polyline(Point(10, 10), Point(20, 20), Point(30, 10), color=Color(48, 210, 111)),
+        Circle(Point(12345, 54321), 999, Color(123, 255, 0)),
+        Dot(Point(-5, -5), Color(1, 2, 3)),
+    ]
+
+
+def test_is_scene_file():
+    assert is_scene_file('scene.cadb')
+    assert is_scene_file('/some/path/SCENE.CADB')
+    assert not is_scene_file('scene.txt')
+    assert not is_scene_file('cadb')
+
+
+def test_save_and_load_scene(shapes, tmp_path):
+    file = str(tmp_path / 'scene.cadb')
+    save_scene(file, shapes)
+
+    loaded = load_scene(file)
+    # Order of the shapes is kept, even though the shapes of each type are stored together
+    assert loaded == shapes
+    # Every color is stored only once
+    assert loaded[1].color is loaded[5].color
+
+    with open(file, 'rb') as f:
+        sections = read_sections(f.read())
+    assert sections[PALETTE_TAG][0] == 5
+    assert sections[DOT_TAG][0] == 2
+    assert bytes(sections[ORDER_TAG][1]) == bytes([3, 0, 1, 2, 4, 0])
+
+
+def test_empty_scene(tmp_path):
+    file = str(tmp_path / 'scene.cadb')
+    save_scene(file, [])
+    assert load_scene(file) == []
+
+
+def test_invalid_scene(shapes, tmp_path):
+    file = tmp_path / 'scene.cadb'
+
+    file.write_bytes(b'dot 10,10\n')
+    with pytest.raises(SceneFormatError):
+        load_scene(str(file))
+
+    file.write_bytes(HEADER.pack(SCENE_MAGIC, SCENE_VERSION + 1, 0, 0))
+    with pytest.raises(SceneFormatError):
+        load_scene(str(file))
+
+    save_scene(str(file), shapes)
+    file.write_bytes(file.read_bytes()[:-10])
+    with pytest.raises(SceneFormatError):
+        load_scene(str(file))
+
+
+def test_coordinates_out_of_range(tmp_path):
+    with pytest.raises(SceneFormatError):
+        save_scene(str(tmp_path / 'scene.cadb'), [Dot(Point(2 ** 40, 0), Color(0, 0, 0))])
+    with pytest.raises(SceneFormatError):
+        save_scene(str(tmp_path / 'scene.cadb'), [Polyline(Point(0, 0), Point(0, -2 ** 40), color=Color(0, 0, 0))])
+
+
+def test_mapped_scene(shapes, tmp_path):
+    file = str(tmp_path / 'scene.cadb')
+    # Enough shapes for a few checkpoints
+    many = shapes * (CHECKPOINT_INTERVAL // 2)
+    save_scene(file, many)
+
+    scene = MappedScene(file)
+    assert len(scene) == len(many)
+    # Nothing is created when the scene is opened
+    assert scene.created == 0
+    for position in [0, 3, 5, CHECKPOINT_INTERVAL - 1, CHECKPOINT_INTERVAL + 2, len(many) - 1]:
+        assert scene.shape(position) == many[position]
+    assert scene.created == 6
+    # Created shapes are kept
+    assert scene.shape(3) is scene.shape(3)
+    assert list(scene.shapes(CHECKPOINT_INTERVAL - 3, CHECKPOINT_INTERVAL + 3)) == \
+        many[CHECKPOINT_INTERVAL - 3:CHECKPOINT_INTERVAL + 3]
+
+    # Only the shapes intersecting the viewport (just the polylines and the line here) are created
+    scene = MappedScene(file)
+    visible = list(scene.visible_shapes(0, len(scene), BoundingBox(5, -1000, 25, 30)))
+    assert [shape for shape in visible if shape is not None] == [
+        shape for shape in many if isinstance(shape, (Polyline, Line))
+    ]
+    assert scene.created == len(many) // 3
+    # Only the shapes close to the point are created
+    scene = MappedScene(file)
+    assert list(scene.shapes_near(0, len(scene), Point(12, 200000001))) == [shapes[1]] * (CHECKPOINT_INTERVAL // 2)
+    assert scene.created == CHECKPOINT_INTERVAL // 2
+
+
+def test_mapped_shapes(shapes, tmp_path):
+    file = str(tmp_path / 'scene.cadb')
+    save_scene(file, shapes)
+    mapped = MappedShapes(MappedScene(file))
+    assert mapped == shapes
+    assert mapped[1:3] == shapes[1:3]
+    assert mapped[-1] == shapes[-1]
+    assert mapped.shapes_at(Point(12345, 54000)) == [shapes[4]]
+
+    # Shapes added to and removed from the end don't change the mapped shapes
+    dot = Dot(Point(1, 1), Color(0, 0, 0))
+    copied = mapped.copy()
+    copied.append(dot)
+    assert copied.mapped == 6
+    assert copied[6] is dot
+    assert mapped == shapes
+    del copied[-3:]
+    assert copied.mapped == 4
+    assert copied == shapes[:4]
+    assert copied.pop() == shapes[3]
+    assert copied.visible_shapes(0, 10, BoundingBox(0, 0, 5, 5)) == ([shapes[0]], 2)
+
+    # Any other change creates all the shapes
+    copied.remove(shapes[1])
+    assert copied.mapped == 0
+    assert copied == [shapes[0], shapes[2]]
+    assert mapped == shapes
+
+
+def test_invalid_mapped_scene(shapes, tmp_path):
+    file = tmp_path / 'scene.cadb'
+
+    file.write_bytes(b'')
+    with pytest.raises(SceneFormatError):
+        MappedScene(str(file))
+
+    file.write_bytes(b'dot 10,10\n')
+    with pytest.raises(SceneFormatError):
+        MappedScene(str(file))
+
+    save_scene(str(file), shapes)
+    data = bytearray(file.read_bytes())
+    # Type of the first shape in the order section is unknown
+    data[data.index(bytes([3, 0, 1, 2, 4, 0]))] = 7
+    file.write_bytes(bytes(data))
+    with pytest.raises(SceneFormatError):
+        MappedScene(str(file))
@@ -1,4 +1,5 @@
 import copy
+import math
 from typing import Dict
 
 import pytest
@@ -6,9 +7,10 @@ from PyQt5.QtGui import QColor
 
 from app.shapes import Circle, Rectangle, Line, Dot, Polyline
 from app.printers import Printer
-from app.shapes_store import ShapesStore
+from app.scene_file import save_scene, MappedScene, MappedShapes
+from app.shapes_store import ShapesStore, CHUNK_SIZE
 from app.shapes import Shape
-from app.utils import Point, Color
+from app.utils import Point, Color, BoundingBox
 
 
 class ControllerMockup:
@@ -80,6 +82,62 @@ def test_print_all(shapes_store: ShapesStore, shapes: Dict[str, Shape]):
 
     shapes_store.print_all(printer, Point(10, 10))
     assert printer.polyline == 'printedprinted'
+    assert shapes_store.culled == 0
+
+
+def test_print_all_viewport(shapes_store: ShapesStore, shapes: Dict[str, Shape]):
+    shapes_store.add_shapes(*shapes.values())
+    printer = PrinterMockup()
+    printed = shapes_store.print_all(printer, viewport=BoundingBox(0, 0, 800, 600))
+
+    # Only the polyline and the rectangle are (at least partially) visible
+    assert printed == [shapes['polyline'], shapes['rectangle']]
+    assert shapes_store.culled == 3
+    assert printer.dot == ''
+    assert printer.line == ''
+    assert printer.circle == ''
+
+    printed = shapes_store.print_all(printer, viewport=BoundingBox(12000, 54000, 12100, 54100))
+    assert printed == [shapes['circle']]
+    assert shapes_store.culled == 4
+
+    printed = shapes_store.print_all(printer)
+    assert printed == [*shapes.values()]
+    assert shapes_store.culled == 0
+
+
+def test_print_chunk(shapes_store: ShapesStore, shapes: Dict[str, Shape]):
+    shapes_store.add_shapes(*[shapes['polyline']] * 600, shapes['dot'])
+    shapes_store.set_preview(shapes['rectangle'])
+    printer = PrinterMockup()
+    viewport = BoundingBox(0, 0, 800, 600)
+
+    # Deadline has already passed, but at least one chunk is always printed
+    assert shapes_store.print_chunk(printer, 0, viewport, deadline=0) == CHUNK_SIZE
+    assert printer.polyline == 'printed' * CHUNK_SIZE
+    assert printer.rect == ''
+
+    assert shapes_store.print_chunk(printer, CHUNK_SIZE, viewport, deadline=math.inf) == 601
+    assert printer.polyline == 'printed' * 600
+    assert printer.dot == ''
+    assert shapes_store.culled == 1
+
+    shapes_store.print_preview(printer)
+    assert printer.rect == 'printed'
+
+
+def test_generation(shapes_store: ShapesStore, shapes: Dict[str, Shape]):
+    generation = shapes_store.generation
+    shapes_store.set_preview(shapes['line'])
+    assert shapes_store.generation == generation
+
+    shapes_store.add_shapes(shapes['line'])
+    assert shapes_store.generation > generation
+    generation = shapes_store.generation
+
+    shapes_store.remove_last_shape()
+    assert shapes_store.generation > generation
+    assert ShapesStore(shapes_store._controller).generation > shapes_store.generation
 
 
 def test_set_preview(shapes_store: ShapesStore, shapes: Dict[str, Shape]):
@@ -107,6 +165,51 @@ def test_add_shapes(shapes_store: ShapesStore, shapes: Dict[str, Shape]):
     assert shapes_store._shapes[3] is not shapes['circle']
 
 
+def test_add_loaded_shapes(shapes_store: ShapesStore, shapes: Dict[str, Shape]):
+    loaded = [shapes['dot'], shapes['line'], shapes['rectangle']]
+    shapes_store.add_loaded_shapes(loaded)
+    assert shapes_store._shapes == loaded
+    assert shapes_store._shapes[0] is shapes['dot']
+    assert len(shapes_store._controller.result) == 1
+
+    shapes_store.remove_last_shapes(2)
+    assert shapes_store._shapes == [shapes['dot']]
+    assert len(shapes_store._controller.result) == 2
+
+    # Removing no shapes doesn't change anything
+    shapes_store.remove_last_shapes(0)
+    assert len(shapes_store._controller.result) == 2
+
+
+def test_add_mapped_shapes(shapes_store: ShapesStore, shapes: Dict[str, Shape], tmp_path):
+    file = str(tmp_path / 'scene.cadb')
+    save_scene(file, [Dot(Point(x, 0), Color(0, 0, 0)) for x in range(0, 10 * CHUNK_SIZE, 10)] + [shapes['line']])
+    mapped = MappedShapes(MappedScene(file))
+    shapes_store.add_loaded_shapes(mapped)
+    assert shapes_store.is_mapped()
+    assert len(shapes_store.shapes_at()) == CHUNK_SIZE + 1
+
+    # Only the shapes which are printed (or found) are created
+    printer = PrinterMockup()
+    assert shapes_store.print_all(printer, viewport=BoundingBox(0, -5, 15, 5)) == [
+        Dot(Point(0, 0), Color(0, 0, 0)), Dot(Point(10, 0), Color(0, 0, 0))
+    ]
+    assert shapes_store.culled == CHUNK_SIZE - 1
+    assert shapes_store.print_chunk(printer, 0, BoundingBox(1000, -5, 1005, 5), math.inf) == CHUNK_SIZE + 1
+    assert printer.dot == 'printed' * 3
+    assert shapes_store.culled == CHUNK_SIZE
+    assert shapes_store.shapes_at(Point(20, 0)) == [Dot(Point(20, 0), Color(0, 0, 0))]
+    assert mapped.scene.created == 4
+
+    # Given shapes are not changed by the store
+    shapes_store.remove_last_shapes(1)
+    assert len(mapped) == CHUNK_SIZE + 1
+    shapes_store.remove_shapes_at(Point(0, 0))
+    assert shapes_store.shapes_at()[0] == Dot(Point(10, 0), Color(0, 0, 0))
+    assert not shapes_store.is_mapped()
+    assert mapped[0] == Dot(Point(0, 0), Color(0, 0, 0))
+
+
 def test_move_shapes(shapes_store: ShapesStore, shapes: Dict[str, Shape]):
     shapes_store.add_shapes(*shapes.values())
 
@@ -3,7 +3,7 @@ from typing import Dict
 import pytest
 
 from app.shapes import Shape, Dot, Line, Rectangle, Circle, Polyline
-from app.utils import Point, Color
+from app.utils import Point, Color, BoundingBox
 from app.printers import Printer
 
 
@@ -43,6 +43,9 @@ def test_abstract_shape():
     with pytest.raises(NotImplementedError):
         abstract_shape.contains(Point(1, 1))
 
+    with pytest.raises(NotImplementedError):
+        abstract_shape.bounding_box()
+
     assert str(abstract_shape) == ' with Color(0, 1, 2, alpha=255)'
     assert abstract_shape == Shape(Point(100, 100), Color(0, 1, 2))
     assert abstract_shape != Shape(Point(100, 101), Color(0, 1, 2))
@@ -70,6 +73,7 @@ def test_dot(shapes: Dict[str, Shape]):
     assert dot.contains(Point(11, 200000000), divergence=True) is True
     assert dot.contains(Point(11, 200000000)) is False
     assert dot.contains(Point(13, 200000000), divergence=True) is False
+    assert dot.bounding_box() == BoundingBox(10, 200000000, 10, 200000000)
 
     new_dot = dot.move(Point(10, 200000000), Point(0, 0))
     assert dot.start == Point(10, 200000000)
@@ -95,6 +99,7 @@ def test_line(shapes: Dict[str, Shape]):
     assert line.contains(Point(502, -1000), divergence=True) is True
     assert line.contains(Point(-1, -1000)) is False
     assert line.contains(Point(-3, -1000), divergence=False) is False
+    assert line.bounding_box() == BoundingBox(0, -1000, 1000, -1000)
 
     # Vertical move
     new_line = line.move(Point(500, -1000), Point(500, 0))
@@ -139,6 +144,7 @@ def test_polyline(shapes: Dict[str, Shape]):
     assert polyline.contains(Point(15, 16)) is False
     assert polyline.contains(Point(24, 15)) is False
     assert polyline.contains(Point(24, 15), divergence=True) is False
+    assert polyline.bounding_box() == BoundingBox(10, 10, 30, 20)
 
     # Vertical move
     new_polyline = polyline.move(Point(20, 20), Point(20, 10))
@@ -186,6 +192,7 @@ def test_rectangle(shapes: Dict[str, Shape]):
     assert rect.contains(Point(1, 50000)) is True
     assert rect.contains(Point(2, 0)) is False
     assert rect.contains(Point(0, 50001)) is False
+    assert rect.bounding_box() == BoundingBox(0, 0, 1, 50000)
 
     # Vertical move
     new_rect = rect.move(Point(1, 3500), Point(1, 0))
@@ -223,6 +230,7 @@ def test_circle(shapes: Dict[str, Shape]):
     assert circle.contains(Point(12345, 53322)) is True
     assert circle.contains(Point(12344, 53322)) is False
     assert circle.contains(Point(13344, 54322)) is False
+    assert circle.bounding_box() == BoundingBox(11346, 53322, 13344, 55320)
 
     # Vertical move
     new_circle = circle.move(Point(13344, 54321), Point(13344, 0))
@@ -0,0 +1,82 @@
+import pytest
+from PyQt5.QtGui import QImage
+from pytestqt.qtbot import QtBot
+
+from app.controller import Controller
+from app.shapes import Rectangle, Dot, Circle, Polyline
+from app.tiled_renderer import TiledRenderer
+from app.utils import Point, Color
+
+
+@pytest.fixture
+def controller(qtbot: QtBot) -> Controller:
+    controller = Controller()
+    controller.run_app()
+    controller._gui.resize(800, 600)
+    qtbot.addWidget(controller._gui)
+    controller.add_shapes(
+        *[Rectangle(Point(i * 37 % 700, i * 23 % 400), 30, 20, Color(i % 256, 0, 0)) for i in range(300)],
+        *[Dot(Point(i * 11 % 700, i * 13 % 400), Color(0, 0, i % 256)) for i in range(300)],
+        Circle(Point(300, 250), 200, Color(0, 255, 0, 100)),
+        Polyline(*[Point(i * 7, 300 + i % 2 * 50) for i in range(100)], color=Color(0, 0, 0))
+    )
+    return controller
+
+
+def different_pixels(image: QImage, other: QImage) -> int:
+    return sum(
+        1 for x in range(image.width()) for y in range(image.height()) if image.pixel(x, y) != other.pixel(x, y)
+    )
+
+
+def test_tiled_rendering(controller: Controller, qtbot: QtBot):
+    canvas = controller._gui.canvas
+    for zoom_levels, pan in [(0, (0, 0)), (3, (37, -91))]:
+        canvas.zoom_by(zoom_levels, 0, 0)
+        canvas.pan_by(*pan)
+        canvas.set_tiled(False)
+        canvas.repaint()
+        expected = canvas.grab().toImage()
+
+        canvas.set_tiled()
+        canvas.repaint()
+        tiled = canvas.grab().toImage()
+        # Qt breaks ties of edges lying exactly on pixel centers (e.g. dots at integer positions)
+        # depending on the position on the paint device, so a few edge pixels may differ by one
+        assert tiled.size() == expected.size()
+        assert different_pixels(tiled, expected) <= expected.width() * expected.height() // 1000
+
+
+def test_tiles_reused(controller: Controller):
+    canvas = controller._gui.canvas
+    canvas.set_tiled()
+    renderer: TiledRenderer = canvas._renderer
+    canvas.repaint()
+    assert renderer.hits == 0
+    tiles = len(renderer)
+    assert tiles == renderer.misses > 0
+
+    # Panning back and forth renders only the newly shown tiles
+    canvas.pan_by(300, 0)
+    canvas.repaint()
+    canvas.pan_by(-300, 0)
+    canvas.repaint()
+    assert renderer.misses < 2 * tiles
+    assert renderer.hits > tiles
+
+    # Zooming renders new tiles, the old ones stay for zooming back
+    misses = renderer.misses
+    canvas.zoom_by(1)
+    canvas.repaint()
+    canvas.zoom_by(-1)
+    canvas.repaint()
+    assert renderer.misses > misses
+    assert len(renderer) > tiles
+
+    # Changed scene throws away all the tiles
+    controller.add_shapes(Dot(Point(10, 10), Color(0, 0, 0)))
+    canvas.repaint()
+    assert len(renderer) == tiles
+
+    canvas.set_tiled(False)
+    assert canvas._renderer is None
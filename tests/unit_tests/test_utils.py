@@ -2,7 +2,7 @@ import math
 
 import pytest
 
-from app.utils import Point, Singleton, Color, distance
+from app.utils import Point, Singleton, Color, BoundingBox, distance, distance_to_segment, simplify_polyline
 
 
 class TestSingletonClass(metaclass=Singleton):
@@ -78,6 +78,26 @@ def test_color():
         c6 = Color(255, 255, 255, 256)
 
 
+def test_bounding_box():
+    box = BoundingBox(0, 0, 100, 50)
+    assert box.left == 0
+    assert box.top == 0
+    assert box.right == 100
+    assert box.bottom == 50
+
+    assert box == BoundingBox(0, 0, 100, 50)
+    assert box != BoundingBox(0, 0, 100, 51)
+    assert str(box) == 'BoundingBox(0, 0, 100, 50)'
+
+    assert box.intersects(BoundingBox(50, 25, 60, 30)) is True
+    assert box.intersects(BoundingBox(-10, -10, 200, 200)) is True
+    # Edges are inclusive
+    assert box.intersects(BoundingBox(100, 50, 150, 150)) is True
+    assert box.intersects(BoundingBox(101, 0, 150, 50)) is False
+    assert box.intersects(BoundingBox(0, -20, 100, -1)) is False
+    assert box.intersects(BoundingBox(10, 200000000, 10, 200000000)) is False
+
+
 def test_singleton():
     a = TestSingletonClass()
     b = TestSingletonClass()
@@ -97,3 +117,27 @@ def test_distance():
     assert distance(Point(0, 0), Point(10, 0)) == 10
     assert distance(Point(0, 0), Point(0, -100)) == 100
     assert math.isclose(distance(Point(0, 0), Point(20, 20)), 28.284271247461902) is True
+
+
+def test_distance_to_segment():
+    assert distance_to_segment(Point(5, 5), Point(0, 0), Point(10, 0)) == 5
+    assert distance_to_segment(Point(-3, 4), Point(0, 0), Point(10, 0)) == 5
+    assert distance_to_segment(Point(13, -4), Point(0, 0), Point(10, 0)) == 5
+    assert distance_to_segment(Point(3, 4), Point(0, 0), Point(0, 0)) == 5
+
+
+def test_simplify_polyline():
+    assert simplify_polyline([Point(0, 0), Point(10, 10)], 1) == [Point(0, 0), Point(10, 10)]
+
+    # Points on a straight line are all dropped except the ends
+    line = [Point(i, 2 * i) for i in range(100)]
+    assert simplify_polyline(line, 0.5) == [Point(0, 0), Point(99, 198)]
+
+    # Small zigzag is dropped, big one is kept
+    zigzag = [Point(0, 0), Point(1, 0.3), Point(2, 0), Point(3, 5), Point(4, 0)]
+    assert simplify_polyline(zigzag, 0.5) == [Point(0, 0), Point(2, 0), Point(3, 5), Point(4, 0)]
+    assert simplify_polyline(zigzag, 0.1) == zigzag
+
+    # Closed polyline
+    square = [Point(0, 0), Point(10, 0), Point(10, 10), Point(0, 10), Point(0, 0)]
+    assert simplify_polyline(square, 0.5) == square